@@ -0,0 +1,135 @@
+from collections import deque
+
+import numpy as np
+
+from SignalBuffer import SignalBuffer
+
+
+class AdaptiveRPeaks:
+    LEARNING_TIME = 2
+    REFRACTORY_PERIOD = 0.2
+    SEARCH_BACK_FACTOR = 1.66
+    RR_HISTORY = 8
+    SEARCH_SIZE = 40
+
+    def __init__(self, data_source, band_pass, delay=0, search_size=SEARCH_SIZE, quality=None):
+        self.data = SignalBuffer()
+        self.data_source = data_source
+        self.band_pass = band_pass
+        self.delay = delay
+        self.search_size = search_size
+        self.quality = quality
+        self.skipped_candidates = 0
+
+        # index of the next sample of the data source that can be checked for a local maximum
+        self.cursor = 1
+
+        self.signal_level = None
+        self.noise_level = None
+        self.rr_intervals = deque(maxlen=type(self).RR_HISTORY)
+        self.last_qrs_time = None
+        self.search_back_candidate = None
+
+    @property
+    def threshold(self):
+        return self.noise_level + 0.25 * (self.signal_level - self.noise_level)
+
+    def learn(self):
+        times, values = self.data_source.data.since(self.data_source.data.first_index)
+        if len(times) < 2 or times[-1] - times[0] < type(self).LEARNING_TIME:
+            return False
+
+        self.signal_level = np.max(values) / 3
+        self.noise_level = np.mean(values) / 2
+        return True
+
+    def locate_peak(self, index, time):
+        band_pass_index = index + self.delay
+        if band_pass_index >= len(self.band_pass.data) or self.band_pass.data[band_pass_index].time != time:
+            band_pass_index = self.band_pass.data.search(time)
+
+        times, values = self.band_pass.data.window(band_pass_index - self.search_size, band_pass_index + 1)
+        peak = np.argmax(values)
+        return times[peak], values[peak]
+
+    def detect(self, index, time):
+        if self.last_qrs_time is not None:
+            self.rr_intervals.append(time - self.last_qrs_time)
+        self.last_qrs_time = time
+        self.search_back_candidate = None
+
+        peak_time, peak_value = self.locate_peak(index, time)
+        if len(self.data) == 0 or peak_time > self.data[-1].time:
+            self.data.append(peak_time, peak_value)
+
+    def search_back(self, time):
+        if self.last_qrs_time is None or self.search_back_candidate is None or not self.rr_intervals:
+            return
+
+        if time - self.last_qrs_time <= type(self).SEARCH_BACK_FACTOR * np.mean(self.rr_intervals):
+            return
+
+        index, candidate_time, value = self.search_back_candidate
+        self.search_back_candidate = None
+
+        if value > 0.5 * self.threshold:
+            self.signal_level = 0.25 * value + 0.75 * self.signal_level
+            self.detect(index, candidate_time)
+
+    def classify(self, index, time, value):
+        self.search_back(time)
+
+        if self.last_qrs_time is not None and time - self.last_qrs_time < type(self).REFRACTORY_PERIOD:
+            return
+
+        if value > self.threshold:
+            self.signal_level = 0.125 * value + 0.875 * self.signal_level
+            self.detect(index, time)
+            return
+
+        self.noise_level = 0.125 * value + 0.875 * self.noise_level
+
+        if value > 0.5 * self.threshold and (self.search_back_candidate is None or value > self.search_back_candidate[2]):
+            self.search_back_candidate = (index, time, value)
+
+    def update(self):
+        if self.signal_level is None and not self.learn():
+            return
+
+        first = max(self.cursor - 1, self.data_source.data.first_index)
+        times, values = self.data_source.data.since(first)
+
+        if self.quality is not None:
+            # samples are only examined once the quality of their segment is known
+            covered = int(np.searchsorted(times, self.quality.covered))
+            times, values = times[:covered], values[:covered]
+
+        if len(values) < 3:
+            return
+
+        middle = values[1:-1]
+        peaks = np.nonzero((values[:-2] < middle) & (middle >= values[2:]))[0] + 1
+
+        breaks = None
+        if self.quality is not None:
+            usable = self.quality.usable_at(times)
+            self.skipped_candidates += int(np.count_nonzero(~usable[peaks]))
+            # number of unusable samples before every position, a change between two peaks breaks the RR sequence
+            breaks = np.cumsum(~usable)
+            peaks = peaks[usable[peaks]]
+
+        unusable = 0
+        for peak in peaks.tolist():
+            if breaks is not None and breaks[peak] != unusable:
+                self.last_qrs_time = None
+                self.search_back_candidate = None
+                unusable = breaks[peak]
+            self.classify(first + peak, times[peak], values[peak])
+
+        if breaks is not None and breaks[-2] != unusable:
+            # the batch ends past a gap, a candidate from before it must not be searched back
+            self.last_qrs_time = None
+            self.search_back_candidate = None
+        else:
+            self.search_back(times[-2])
+        self.cursor = first + len(values) - 1
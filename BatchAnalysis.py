@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+
+from Ecg import ECG
+from RecordedData import RecordedData
+from MappedData import MappedData
+
+
+class BatchAnalysis:
+    METRICS = ('heart_rate', 'sdrr', 'rmssd', 'prr50', 'lf', 'hf')
+
+    def __init__(self, recorded_data):
+        self.recorded_data = recorded_data
+        self.ecg = ECG(raw_data=recorded_data)
+
+        # a recording without a start time is reported with none rather than with the time of the analysis
+        self.ecg.start_time = recorded_data.start_time
+
+    @classmethod
+    def from_file(cls, path):
+        if os.path.splitext(path)[1].lower() == '.raw':
+            recorded_data = MappedData(path)
+        else:
+            # only JSON recordings and sessions store a start time, raw and CSV captures are reported without one
+            recorded_data = RecordedData.from_file(path)
+
+        return cls(recorded_data)
+
+    def run(self):
+        self.ecg.resampling.update()
+        self.ecg.signal_quality.update()
+        self.ecg.band_pass.update()
+        self.ecg.derivative.update()
+        self.ecg.squaring.update()
+        self.ecg.integration.update()
+        self.ecg.r_peaks.update()
+
+        self.ecg.heart_rate.update()
+        self.ecg.rr_intervals.update()
+        self.ecg.sdrr.update()
+        self.ecg.rmssd.update()
+        self.ecg.prr50.update()
+        self.ecg.lf.update()
+        self.ecg.hf.update()
+
+        return self.summary()
+
+    def summary(self):
+        raw_times = self.ecg.raw_data.data.times
+
+        summary = {
+            'start_time': self.ecg.start_time,
+            'samples': len(self.ecg.raw_data.data),
+            'duration': float(raw_times[-1] - raw_times[0]) if len(raw_times) else 0.0,
+            'r_peaks': len(self.ecg.r_peaks.data)
+        }
+
+        for name in type(self).METRICS:
+            data = getattr(self.ecg, name).data
+            summary[name] = data[-1].value if len(data) else None
+
+        ratio = self.ecg.spectrum.lf_hf_ratio
+        summary['lf_hf_ratio'] = ratio[-1].value if len(ratio) else None
+
+        return summary
+
+    def save(self, path):
+        model = {
+            'summary': self.summary(),
+            'r_peaks': self.ecg.r_peaks.data.tolist(),
+            'lf_hf_ratio': self.ecg.spectrum.lf_hf_ratio.tolist()
+        }
+
+        for name in type(self).METRICS:
+            model[name] = getattr(self.ecg, name).data.tolist()
+
+        with open(path, 'w') as outfile:
+            json.dump(model, outfile)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: {} RECORDING [RESULT_FILE]".format(sys.argv[0]))
+        sys.exit(1)
+
+    analysis = BatchAnalysis.from_file(sys.argv[1])
+    print(json.dumps(analysis.run(), indent=2))
+
+    if len(sys.argv) > 2:
+        analysis.save(sys.argv[2])
@@ -0,0 +1,142 @@
+import os
+import sys
+import csv
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from BatchAnalysis import BatchAnalysis
+from RecordedData import RecordedData
+from SessionWriter import SessionWriter
+
+
+class BatchRunner:
+    RECORDING_EXTENSIONS = ('.json', '.raw', SessionWriter.EXTENSION) + RecordedData.CSV_EXTENSIONS
+    RESULT_SUFFIX = '.result.json'
+    MANIFEST_NAME = 'completed.txt'
+    SUMMARY_NAME = 'summary.csv'
+
+    # recycle workers so memory held by long recordings is returned to the system
+    MAX_TASKS_PER_CHILD = 20
+
+    def __init__(self, input_directory, output_directory, workers=None):
+        self.input_directory = input_directory
+        self.output_directory = output_directory
+        self.workers = workers or os.cpu_count()
+        self.manifest_path = os.path.join(output_directory, type(self).MANIFEST_NAME)
+        self.failures = {}
+
+    def find_recordings(self):
+        recordings = []
+        output_directory = os.path.realpath(self.output_directory)
+        for directory, directory_names, file_names in os.walk(self.input_directory):
+            # an output directory inside the input holds results and the summary, never recordings
+            directory_names[:] = [name for name in directory_names
+                                  if os.path.realpath(os.path.join(directory, name)) != output_directory]
+            outputs = (type(self).SUMMARY_NAME, type(self).MANIFEST_NAME) \
+                if os.path.realpath(directory) == output_directory else ()
+            for file_name in file_names:
+                if file_name.endswith(type(self).RESULT_SUFFIX) or file_name in outputs:
+                    continue
+                if os.path.splitext(file_name)[1].lower() in type(self).RECORDING_EXTENSIONS:
+                    path = os.path.join(directory, file_name)
+                    recordings.append(os.path.relpath(path, self.input_directory))
+        return sorted(recordings)
+
+    def result_path(self, recording):
+        return os.path.join(self.output_directory, recording + type(self).RESULT_SUFFIX)
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return set()
+
+        with open(self.manifest_path) as manifest:
+            return set(line.rstrip('\n') for line in manifest if line.strip())
+
+    def mark_completed(self, recording):
+        with open(self.manifest_path, 'a') as manifest:
+            manifest.write(recording + '\n')
+            manifest.flush()
+            os.fsync(manifest.fileno())
+
+    @staticmethod
+    def analyse(path, result_path):
+        analysis = BatchAnalysis.from_file(path)
+        summary = analysis.run()
+
+        os.makedirs(os.path.dirname(result_path), exist_ok=True)
+        temporary_path = result_path + '.tmp'
+        analysis.save(temporary_path)
+        os.replace(temporary_path, result_path)
+
+        return summary
+
+    def create_executor(self):
+        try:
+            return ProcessPoolExecutor(max_workers=self.workers, max_tasks_per_child=type(self).MAX_TASKS_PER_CHILD)
+        except TypeError:
+            # max_tasks_per_child needs Python 3.11
+            return ProcessPoolExecutor(max_workers=self.workers)
+
+    def run(self):
+        os.makedirs(self.output_directory, exist_ok=True)
+
+        completed = self.load_manifest()
+        pending = [recording for recording in self.find_recordings() if recording not in completed]
+
+        print("{} recordings pending, {} already completed".format(len(pending), len(completed)))
+
+        with self.create_executor() as executor:
+            futures = {
+                executor.submit(type(self).analyse,
+                                os.path.join(self.input_directory, recording),
+                                self.result_path(recording)): recording
+                for recording in pending
+            }
+
+            for future in as_completed(futures):
+                recording = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print("Warning: {} failed: {}".format(recording, e))
+                    self.failures[recording] = str(e)
+                    continue
+
+                self.mark_completed(recording)
+                completed.add(recording)
+
+        self.write_summary(sorted(completed))
+
+    def write_summary(self, recordings):
+        rows = []
+        for recording in recordings:
+            try:
+                with open(self.result_path(recording)) as result_file:
+                    summary = json.load(result_file)['summary']
+            except (IOError, ValueError, KeyError) as e:
+                print("Warning: no result for {}: {}".format(recording, e))
+                continue
+            summary['recording'] = recording
+            rows.append(summary)
+
+        fields = ['recording'] + sorted(set(key for row in rows for key in row) - {'recording'})
+
+        with open(os.path.join(self.output_directory, type(self).SUMMARY_NAME), 'w', newline='') as summary_file:
+            writer = csv.DictWriter(summary_file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse a directory of ECG recordings in parallel")
+    parser.add_argument('input_directory')
+    parser.add_argument('output_directory')
+    parser.add_argument('--workers', type=int, default=None)
+    arguments = parser.parse_args()
+
+    runner = BatchRunner(arguments.input_directory, arguments.output_directory, arguments.workers)
+    runner.run()
+
+    if runner.failures:
+        sys.exit(1)
@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Ecg import ECG
+from RecordedData import RecordedData
+from ReplayData import ReplayData
+from SyntheticData import SyntheticData
+
+
+class LatencyRecorder:
+    # log-spaced histogram from 100 ns to 100 s keeps memory flat for day-long runs
+    BINS = np.logspace(-7, 2, 361)
+    SEGMENTS = 10
+
+    def __init__(self):
+        self.histogram = np.zeros(len(type(self).BINS) + 1, dtype=np.int64)
+        self.segment_totals = np.zeros(type(self).SEGMENTS)
+        self.segment_counts = np.zeros(type(self).SEGMENTS, dtype=np.int64)
+        self.total = 0.0
+        self.count = 0
+        self.maximum = 0.0
+
+    def record(self, latency, segment):
+        self.histogram[np.searchsorted(type(self).BINS, latency)] += 1
+        self.segment_totals[segment] += latency
+        self.segment_counts[segment] += 1
+        self.total += latency
+        self.count += 1
+        self.maximum = max(self.maximum, latency)
+
+    def percentile(self, percent):
+        if self.count == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.histogram), self.count * percent / 100))
+        return float(type(self).BINS[min(index, len(type(self).BINS) - 1)])
+
+    def growth(self):
+        # the first segment is skipped because most stages idle while their inputs warm up
+        means = self.segment_totals[1:] / np.maximum(self.segment_counts[1:], 1)
+        if len(means) < 2 or means[0] <= 0:
+            return 1.0
+        return float(means[-1] / means[0])
+
+    def summary(self):
+        return {
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.maximum,
+            'mean': self.total / self.count if self.count else 0.0,
+            'total': self.total,
+            'updates': self.count,
+            'growth': self.growth()
+        }
+
+
+class Benchmark:
+    DURATIONS = (60, 600, 3600, 6 * 3600, 24 * 3600)
+    FS = 200
+    CHUNK_SIZE = 20
+
+    # a stage whose mean update time at the end of a run exceeds this multiple of the start is flagged
+    GROWTH_THRESHOLD = 2.0
+    # stages below this mean update time are too cheap to flag reliably
+    MIN_FLAGGED_MEAN = 5e-6
+
+    # entry points whose cold import is timed, the budget in seconds and the packages a headless start must not load
+    IMPORT_MODULES = ('Ecg', 'BatchAnalysis', 'MultiChannel')
+    IMPORT_BUDGET = 0.5
+    IMPORT_REPEATS = 5
+    HEADLESS_EXCLUDED = ('matplotlib', 'scipy')
+    IMPORT_SCRIPT = (
+        "import json, resource, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({{'time': elapsed, 'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,\n"
+        "                  'loaded': sorted(name for name in {excluded!r} if name in sys.modules)}}))\n"
+    )
+
+    def __init__(self, durations=DURATIONS, recording=None, chunk_size=CHUNK_SIZE, import_budget=IMPORT_BUDGET):
+        self.durations = durations
+        self.recording = recording
+        self.chunk_size = chunk_size
+        self.import_budget = import_budget
+
+    def create_source(self, duration):
+        if self.recording is None:
+            return SyntheticData(fs=type(self).FS, chunk_size=self.chunk_size, seed=0), int(duration * type(self).FS)
+
+        recorded = RecordedData.from_file(self.recording)
+        times, values = recorded.data.since(0)
+        # repeat the recording until it covers the requested duration
+        repeats = int(np.ceil(duration / (times[-1] - times[0]))) if len(times) > 1 else 1
+        period = times[-1] - times[0] + (times[1] - times[0] if len(times) > 1 else 0)
+        times = np.concatenate([times + i * period for i in range(repeats)])
+        values = np.tile(values, repeats)
+        samples = int(np.searchsorted(times, times[0] + duration))
+        return ReplayData(RecordedData(times[:samples], values[:samples]), chunk_size=self.chunk_size), samples
+
+    def run_duration(self, duration):
+        source, samples = self.create_source(duration)
+        ecg = ECG(raw_data=source)
+
+        stages = {name: LatencyRecorder() for name in ECG.STAGES}
+        end_to_end = LatencyRecorder()
+
+        start = time.perf_counter()
+        while len(ecg.raw_data.data) < samples and not source.finished:
+            segment = min(LatencyRecorder.SEGMENTS * source.generated // samples, LatencyRecorder.SEGMENTS - 1)
+            update_start = time.perf_counter()
+            for name in ECG.STAGES:
+                stage_start = time.perf_counter()
+                getattr(ecg, name).update()
+                stages[name].record(time.perf_counter() - stage_start, segment)
+            end_to_end.record(time.perf_counter() - update_start, segment)
+        elapsed = time.perf_counter() - start
+
+        return {
+            'duration': duration,
+            'samples': len(ecg.raw_data.data),
+            'r_peaks': len(ecg.r_peaks.data),
+            'wall_time': elapsed,
+            'throughput': len(ecg.raw_data.data) / elapsed if elapsed > 0 else 0.0,
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'ecg': end_to_end.summary(),
+            'stages': {name: recorder.summary() for name, recorder in stages.items()}
+        }
+
+    def measure_import(self, module):
+        # every import runs in a fresh interpreter, the fastest of a few runs is the least disturbed one
+        script = type(self).IMPORT_SCRIPT.format(module=module, excluded=type(self).HEADLESS_EXCLUDED)
+        runs = [json.loads(subprocess.check_output([sys.executable, '-c', script],
+                                                   cwd=os.path.dirname(os.path.abspath(__file__))))
+                for _ in range(type(self).IMPORT_REPEATS)]
+
+        result = min(runs, key=lambda run: run['time'])
+        result['module'] = module
+        result['budget'] = self.import_budget
+        result['flagged'] = result['time'] > self.import_budget or bool(result['loaded'])
+        return result
+
+    def flag_growth(self, result):
+        return sorted(
+            name for name, summary in result['stages'].items()
+            if summary['growth'] > type(self).GROWTH_THRESHOLD and summary['mean'] > type(self).MIN_FLAGGED_MEAN
+        )
+
+    @staticmethod
+    def commit():
+        try:
+            return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                           cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def run(self):
+        imports = []
+        for module in type(self).IMPORT_MODULES:
+            result = self.measure_import(module)
+            imports.append(result)
+            type(self).print_import(result)
+
+        results = []
+        for duration in self.durations:
+            # a fresh process per duration so peak RSS is measured per run
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(self.run_duration, duration).result()
+            result['flagged'] = self.flag_growth(result)
+            results.append(result)
+            type(self).print_result(result)
+
+        return {
+            'commit': type(self).commit(),
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'recording': self.recording,
+            'chunk_size': self.chunk_size,
+            'imports': imports,
+            'results': results
+        }
+
+    @staticmethod
+    def print_import(result):
+        print("import {:<14} {:>7.1f} ms of {:.0f} ms budget, peak RSS {:.0f} MB{}{}".format(
+            result['module'], result['time'] * 1e3, result['budget'] * 1e3, result['peak_rss_kb'] / 1024,
+            "  LOADS " + ", ".join(result['loaded']) if result['loaded'] else "",
+            "  OVER BUDGET" if result['time'] > result['budget'] else ""))
+
+    @staticmethod
+    def print_result(result):
+        print("{:>8.0f} s: {:>10.0f} samples/s, {:>8.1f} s wall, peak RSS {:.0f} MB, ECG.update p50 {:.1f} us p99 {:.1f} us".format(
+            result['duration'], result['throughput'], result['wall_time'], result['peak_rss_kb'] / 1024,
+            result['ecg']['p50'] * 1e6, result['ecg']['p99'] * 1e6))
+
+        for name, summary in result['stages'].items():
+            print("    {:<14} p50 {:>9.1f} us  p99 {:>9.1f} us  max {:>10.1f} us  growth {:>5.2f}{}".format(
+                name, summary['p50'] * 1e6, summary['p99'] * 1e6, summary['max'] * 1e6, summary['growth'],
+                "  GROWS WITH HISTORY" if name in result['flagged'] else ""))
+
+    @staticmethod
+    def compare(report, baseline):
+        baseline_imports = {result['module']: result for result in baseline.get('imports', [])}
+        for result in report['imports']:
+            previous = baseline_imports.get(result['module'])
+            if previous is not None and previous['time'] > 0:
+                print("import {:<14} {:.2f}x of {}".format(
+                    result['module'], result['time'] / previous['time'], baseline.get('commit')))
+
+        baseline_results = {result['duration']: result for result in baseline['results']}
+
+        for result in report['results']:
+            previous = baseline_results.get(result['duration'])
+            if previous is None:
+                continue
+
+            print("{:>8.0f} s: throughput {:.2f}x of {}".format(
+                result['duration'], result['throughput'] / previous['throughput'], baseline.get('commit')))
+
+            for name, summary in result['stages'].items():
+                previous_mean = previous['stages'].get(name, {}).get('mean', 0)
+                if previous_mean > 0:
+                    print("    {:<14} mean update time {:.2f}x".format(name, summary['mean'] / previous_mean))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ECG pipeline stages")
+    parser.add_argument('--durations', type=float, nargs='+', default=Benchmark.DURATIONS,
+                        help="simulated recording lengths in seconds")
+    parser.add_argument('--recording', help="replay this recording instead of a synthetic ECG")
+    parser.add_argument('--chunk-size', type=int, default=Benchmark.CHUNK_SIZE, help="samples per ECG.update")
+    parser.add_argument('--output', default='benchmark.json', help="file to write the results to")
+    parser.add_argument('--compare', metavar='BASELINE', help="results of an earlier run to compare against")
+    parser.add_argument('--import-budget', type=float, default=Benchmark.IMPORT_BUDGET,
+                        help="seconds a cold import of an entry point may take")
+    arguments = parser.parse_args()
+
+    benchmark = Benchmark(arguments.durations, arguments.recording, arguments.chunk_size, arguments.import_budget)
+    report = benchmark.run()
+
+    with open(arguments.output, 'w') as outfile:
+        json.dump(report, outfile, indent=2)
+
+    if arguments.compare is not None:
+        with open(arguments.compare) as infile:
+            Benchmark.compare(report, json.load(infile))
+
+    if any(result['flagged'] for result in report['results'] + report['imports']):
+        sys.exit(1)
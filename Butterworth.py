@@ -1,7 +1,6 @@
 import numpy as np
-from scipy.signal import butter, lfilter
 
-from DataPoint import DataPoint
+from SignalBuffer import SignalBuffer
 
 
 class Butterworth:
@@ -10,11 +9,12 @@ class Butterworth:
     STOP_INDEX = 3*128
 
     @staticmethod
-    def calculate_frequency(data):
-        return len(data) / (data[-1].time - data[0].time)
+    def calculate_frequency(times):
+        return len(times) / (times[-1] - times[0])
 
     @staticmethod
     def butter_lowpass(highcut, fs, order=2):
+        from scipy.signal import butter
         nyq = 0.5 * fs
         high = highcut / nyq
         b, a = butter(order, high, btype='low')
@@ -22,6 +22,7 @@ class Butterworth:
 
     @staticmethod
     def butter_highpass(lowcut, fs, order=1):
+        from scipy.signal import butter
         nyq = 0.5 * fs
         low = lowcut / nyq
         b, a = butter(order, low, btype='high')
@@ -29,6 +30,7 @@ class Butterworth:
 
     @staticmethod
     def butter_bandpass_filter(data, fs, lowcut, highcut, order_lowcut, order_highcut):
+        from scipy.signal import lfilter
         b1, a1 = Butterworth.butter_lowpass(highcut, fs, order=order_highcut)
         y1 = lfilter(b1, a1, data)
 
@@ -36,24 +38,90 @@ class Butterworth:
         y2 = lfilter(b2, a2, y1)
         return y2
 
-    def __init__(self, data_source, lowcut, highcut, order_lowcut=2, order_highcut=1):
-        self.data = []
+    @staticmethod
+    def butter_bandpass_sos(fs, lowcut, highcut, order_lowcut, order_highcut):
+        # scipy.signal takes longer to import than the rest of the pipeline, it is loaded once a filter is designed
+        from scipy.signal import butter
+        nyq = 0.5 * fs
+        sos_low = butter(order_highcut, highcut / nyq, btype='low', output='sos')
+        sos_high = butter(order_lowcut, lowcut / nyq, btype='high', output='sos')
+        return np.vstack((sos_low, sos_high))
+
+    def __init__(self, data_source, lowcut, highcut, order_lowcut=2, order_highcut=1, capacity=None, streaming=False,
+                 fs=None):
+        self.data = SignalBuffer(capacity)
         self.data_source = data_source
         self.lowcut = lowcut
         self.highcut = highcut
         self.order_lowcut = order_lowcut
         self.order_highcut = order_highcut
 
+        self.streaming = streaming
+        self.fs = fs
+        self.frequency = None
+        self.sos = None
+        self.zi = None
+        self.cursor = 0
+
+    @property
+    def sample_rate(self):
+        # the filter keeps the timestamps, a uniform input stays uniform
+        return getattr(self.data_source, 'sample_rate', None)
+
+    @property
+    def nominal_frequency(self):
+        return self.fs if self.fs is not None else self.sample_rate
+
+    def initialize_streaming(self):
+        from scipy.signal import sosfilt_zi
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+        time_samples, data_samples = self.data_source.data.window(self.cursor, self.cursor + type(self).WINDOW_SIZE)
+
+        self.frequency = self.nominal_frequency
+        if self.frequency is None:
+            self.frequency = type(self).calculate_frequency(time_samples)
+        self.sos = type(self).butter_bandpass_sos(
+            self.frequency,
+            self.lowcut,
+            self.highcut,
+            self.order_lowcut,
+            self.order_highcut
+        )
+        self.zi = sosfilt_zi(self.sos) * data_samples[0]
+
+    def update_streaming(self):
+        from scipy.signal import sosfilt
+        if self.sos is None:
+            # with a nominal sampling rate only the first sample is needed to start the filter
+            required = 1 if self.nominal_frequency is not None else type(self).WINDOW_SIZE
+            if len(self.data_source.data) - max(self.cursor, self.data_source.data.first_index) < required:
+                return
+            self.initialize_streaming()
+
+        time_samples, data_samples = self.data_source.data.since(self.cursor)
+
+        if len(time_samples) == 0:
+            return
+
+        filtered_data, self.zi = sosfilt(self.sos, data_samples, zi=self.zi)
+        self.cursor += len(time_samples)
+
+        self.data.extend(time_samples, filtered_data)
+
     def update(self):
+        if self.streaming:
+            self.update_streaming()
+            return
+
         if len(self.data_source.data) < type(self).WINDOW_SIZE:
             return
 
         if len(self.data) and self.data_source.data[-type(self).WINDOW_SIZE + type(self).START_INDEX].time <= self.data[-1].time:
             return
 
-        data_samples, time_samples = zip(*[(dp.value, dp.time) for dp in self.data_source.data[-type(self).WINDOW_SIZE:]])
+        time_samples, data_samples = self.data_source.data.since(len(self.data_source.data) - type(self).WINDOW_SIZE)
 
-        frequency = type(self).calculate_frequency(self.data_source.data[-type(self).WINDOW_SIZE:])
+        frequency = type(self).calculate_frequency(time_samples)
         filtered_data = type(self).butter_bandpass_filter(
             data_samples,
             frequency,
@@ -65,7 +133,5 @@ class Butterworth:
 
         assert len(time_samples) == len(filtered_data)
 
-        data_points = [DataPoint(time=time_samples[i], value=filtered_data[i])
-                        for i in range(type(self).START_INDEX, type(self).STOP_INDEX)]
-
-        self.data += data_points
+        self.data.extend(time_samples[type(self).START_INDEX:type(self).STOP_INDEX],
+                         filtered_data[type(self).START_INDEX:type(self).STOP_INDEX])
@@ -0,0 +1,180 @@
+import os
+import copy
+import time
+import pickle
+import threading
+from collections import deque
+
+import numpy as np
+
+from SignalBuffer import SignalBuffer
+
+
+class Checkpoint:
+    INTERVAL = 60
+    STATE_NAME = 'state.pickle'
+    SAMPLES_EXTENSION = '.samples'
+    DTYPE = SignalBuffer.SPILL_DTYPE
+    VERSION = 1
+
+    # objects of the ECG besides its stages that hold state
+    SHARED_COMPONENTS = ('rr_statistics', 'spectrum')
+
+    # plain values and random generators that make up the state of a component, everything else is rebuilt by
+    # the constructor. Components name attributes of these types that are not state in their own TRANSIENT
+    STATE_TYPES = (bool, int, float, str, type(None), tuple, list, deque, np.ndarray, np.generic,
+                   np.random.RandomState)
+    MUTABLE_TYPES = (list, deque, np.ndarray, np.random.RandomState)
+
+    def __init__(self, ecg, directory, interval=INTERVAL):
+        self.ecg = ecg
+        self.directory = directory
+        self.interval = interval
+
+        # absolute index up to which the samples file of every buffer is written, and its first index
+        self.written = {}
+        self.bases = {}
+
+        self.last_checkpoint = time.time()
+        self.writer = None
+        self.checkpoints = 0
+        self.skipped = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def components(self):
+        names = type(self.ecg).STAGES + type(self).SHARED_COMPONENTS
+        return [(name, getattr(self.ecg, name)) for name in names]
+
+    def buffers(self):
+        # buffers shared between a view and its engine are saved once, under the first name they are found
+        seen = set()
+        for name, component in self.components():
+            for attribute, value in vars(component).items():
+                if isinstance(value, SignalBuffer) and id(value) not in seen:
+                    seen.add(id(value))
+                    yield '{}.{}'.format(name, attribute), value
+
+    def samples_path(self, key):
+        return os.path.join(self.directory, key + type(self).SAMPLES_EXTENSION)
+
+    def collect(self):
+        references = set(id(component) for _, component in self.components())
+        components = {}
+
+        for name, component in self.components():
+            transient = getattr(type(component), 'TRANSIENT', ())
+            components[name] = {
+                attribute: copy.deepcopy(value) if isinstance(value, type(self).MUTABLE_TYPES) else value
+                for attribute, value in vars(component).items()
+                if attribute not in transient and id(value) not in references
+                and isinstance(value, type(self).STATE_TYPES)
+            }
+
+        buffers = {}
+        appends = []
+        for key, buffer in self.buffers():
+            written = self.written.get(key)
+            restart = written is None
+
+            # samples evicted before they were saved leave a gap, the samples file starts over after it
+            if not restart and written < buffer.first_index and buffer.spill_path is None:
+                restart = True
+
+            if restart:
+                written = buffer.first_index
+                self.bases[key] = buffer.first_index
+
+            times, values = buffer.window(written, len(buffer))
+            appends.append((key, restart, np.column_stack((times, values)).astype(type(self).DTYPE)))
+
+            self.written[key] = written + len(times)
+            buffers[key] = {
+                'base': self.bases[key],
+                'first_index': max(buffer.first_index, self.bases[key]),
+                'length': self.written[key]
+            }
+
+        state = {'version': type(self).VERSION, 'time': time.time(), 'components': components, 'buffers': buffers}
+        return state, appends
+
+    def write(self, state, appends):
+        for key, restart, samples in appends:
+            with open(self.samples_path(key), 'wb' if restart else 'ab') as outfile:
+                samples.tofile(outfile)
+                outfile.flush()
+                os.fsync(outfile.fileno())
+
+        # the state only refers to samples that are already on disk, replacing it is atomic
+        state_path = os.path.join(self.directory, type(self).STATE_NAME)
+        with open(state_path + '.tmp', 'wb') as outfile:
+            pickle.dump(state, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(state_path + '.tmp', state_path)
+
+    def checkpoint(self, wait=False):
+        if self.writer is not None and self.writer.is_alive():
+            if not wait:
+                self.skipped += 1
+                return
+            self.writer.join()
+
+        # only the copy of the state happens on the calling thread, the disk writes run in the background
+        state, appends = self.collect()
+        self.writer = threading.Thread(target=self.write, args=(state, appends), name="Checkpoint", daemon=True)
+        self.writer.start()
+
+        self.last_checkpoint = time.time()
+        self.checkpoints += 1
+
+        if wait:
+            self.writer.join()
+
+    def update(self):
+        if time.time() - self.last_checkpoint >= self.interval:
+            self.checkpoint()
+
+    def close(self):
+        self.checkpoint(wait=True)
+
+    def restore(self):
+        state_path = os.path.join(self.directory, type(self).STATE_NAME)
+        if not os.path.exists(state_path):
+            return False
+
+        with open(state_path, 'rb') as infile:
+            state = pickle.load(infile)
+
+        if state['version'] != type(self).VERSION:
+            raise ValueError("Unsupported checkpoint version {}".format(state['version']))
+
+        for name, component in self.components():
+            for attribute, value in state['components'].get(name, {}).items():
+                setattr(component, attribute, value)
+
+        for key, buffer in self.buffers():
+            if key not in state['buffers']:
+                continue
+
+            layout = state['buffers'][key]
+            path = self.samples_path(key)
+            count = layout['length'] - layout['base']
+
+            # a checkpoint interrupted while writing may have appended samples its state does not know of
+            pair_size = 2 * np.dtype(type(self).DTYPE).itemsize
+            with open(path, 'r+b') as samples_file:
+                samples_file.truncate(count * pair_size)
+
+            samples = np.zeros((0, 2), dtype=type(self).DTYPE)
+            if count:
+                samples = np.asarray(np.memmap(path, dtype=type(self).DTYPE, mode='r', shape=(count, 2)))
+
+            retained = samples[layout['first_index'] - layout['base']:]
+            buffer.reset(retained[:, 0], retained[:, 1], layout['first_index'])
+
+            self.written[key] = layout['length']
+            self.bases[key] = layout['base']
+
+        self.last_checkpoint = time.time()
+        return True
@@ -0,0 +1,169 @@
+import time
+import queue
+import signal
+import multiprocessing
+
+import numpy as np
+
+
+class Dashboard:
+    FRAME_RATE = 10
+    QUEUE_SIZE = 2
+    STOP_TIMEOUT = 5
+
+    # seconds shown of the signals and of the metrics
+    SIGNAL_WINDOW = 10
+    METRIC_WINDOW = 300
+
+    SIGNALS = ('raw_data', 'band_pass')
+    METRICS = ('heart_rate', 'sdrr', 'rmssd', 'prr50', 'lf_hf_ratio')
+
+    # (title, streams) of every panel
+    PANELS = (
+        ('raw', ('raw_data',)),
+        ('band pass', ('band_pass',)),
+        ('heart rate', ('heart_rate',)),
+        ('sdrr / rmssd', ('sdrr', 'rmssd')),
+        ('pnn50', ('prr50',)),
+        ('lf / hf', ('lf_hf_ratio',))
+    )
+
+    def __init__(self, ecg, frame_rate=FRAME_RATE, headless=False, output=None):
+        self.ecg = ecg
+        self.frame_rate = frame_rate
+        self.headless = headless
+        self.output = output
+
+        # spawn instead of fork, the acquisition thread may already be running
+        context = multiprocessing.get_context('spawn')
+        self.queue = context.Queue(maxsize=type(self).QUEUE_SIZE)
+        self.process = context.Process(target=type(self).render, args=(self.queue, headless, output),
+                                       name="Dashboard", daemon=True)
+
+        self.last_frame = 0
+        self.frames = 0
+        self.dropped_frames = 0
+
+    def stream(self, name):
+        if name == 'lf_hf_ratio':
+            return self.ecg.spectrum.lf_hf_ratio
+        return getattr(self.ecg, name).data
+
+    @staticmethod
+    def tail(buffer, window):
+        times, values = buffer.times, buffer.values
+        if len(times) == 0:
+            return np.zeros(0), np.zeros(0)
+
+        start = int(np.searchsorted(times, times[-1] - window))
+        # copies, the buffers keep changing while the frame is pickled and sent
+        return np.array(times[start:]), np.array(values[start:])
+
+    def snapshot(self):
+        frame = {name: type(self).tail(self.stream(name), type(self).SIGNAL_WINDOW) for name in type(self).SIGNALS}
+        frame.update({name: type(self).tail(self.stream(name), type(self).METRIC_WINDOW) for name in type(self).METRICS})
+        frame['r_peaks'] = type(self).tail(self.ecg.r_peaks.data, type(self).SIGNAL_WINDOW)
+        return frame
+
+    def update(self):
+        now = time.time()
+        if now - self.last_frame < 1 / self.frame_rate:
+            return
+        self.last_frame = now
+
+        try:
+            self.queue.put_nowait(self.snapshot())
+            self.frames += 1
+        except queue.Full:
+            # the renderer is behind, skip this frame rather than wait for it
+            self.dropped_frames += 1
+
+    def start(self):
+        self.process.start()
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                self.queue.put(None, timeout=type(self).STOP_TIMEOUT)
+            except queue.Full:
+                pass
+
+            self.process.join(type(self).STOP_TIMEOUT)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+
+        # frames nobody will read would keep the feeder thread, and with it the interpreter exit, waiting on the pipe
+        self.queue.cancel_join_thread()
+        self.queue.close()
+
+    @staticmethod
+    def render(frames, headless, output):
+        # Ctrl-C is meant for the pipeline, which stops the renderer once it has saved its output
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        import matplotlib
+        if headless:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        figure, axes = plt.subplots(len(Dashboard.PANELS), 1, figsize=(10, 12))
+        lines = {}
+        for panel_axes, (title, streams) in zip(axes, Dashboard.PANELS):
+            panel_axes.set_title(title, fontsize='small')
+            for name in streams:
+                lines[name], = panel_axes.plot([], [], label=name)
+            if len(streams) > 1:
+                panel_axes.legend(loc='upper left')
+        figure.tight_layout()
+
+        r_peak_markers = [None, None]
+        rendered = 0
+
+        if not headless:
+            plt.show(block=False)
+
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+
+            # only the newest frame is worth drawing
+            try:
+                while True:
+                    newer = frames.get_nowait()
+                    if newer is None:
+                        frames.put(None)
+                        break
+                    frame = newer
+            except queue.Empty:
+                pass
+
+            for name, line in lines.items():
+                line.set_data(*frame[name])
+
+            for panel, name in enumerate(Dashboard.SIGNALS):
+                if r_peak_markers[panel] is not None:
+                    r_peak_markers[panel].remove()
+                r_peak_markers[panel] = None
+
+                values = frame[name][1]
+                if len(values) and len(frame['r_peaks'][0]):
+                    r_peak_markers[panel] = axes[panel].vlines(frame['r_peaks'][0], values.min(), values.max(), colors='b')
+
+            for panel_axes in axes:
+                panel_axes.relim()
+                panel_axes.autoscale_view()
+
+            if headless:
+                figure.canvas.draw()
+            else:
+                figure.canvas.draw_idle()
+                figure.canvas.flush_events()
+
+            rendered += 1
+
+        if output is not None:
+            figure.savefig(output)
+        print("Dashboard rendered {} frames".format(rendered))
+        plt.close(figure)
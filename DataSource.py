@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+
+from SignalBuffer import SignalBuffer
+
+
+class DataSource(ABC):
+
+    def __init__(self, capacity=None, spill_path=None):
+        self.data = SignalBuffer(capacity, spill_path)
+
+        # times of samples the device sent without signal, while the electrodes were off or beyond the ADC range
+        self.lead_off = SignalBuffer(capacity)
+        self.saturated = SignalBuffer(capacity)
+
+    @abstractmethod
+    def update(self):
+        pass
+
+    def wait(self, timeout):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
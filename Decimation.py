@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class Decimation:
+    FACTOR = 4
+    MIN_SIZE = 1024
+
+    def __init__(self, times, values, factor=FACTOR):
+        self.factor = factor
+
+        # level 0 is the signal itself, every further level keeps the minimum and maximum of factor buckets below
+        self.levels = [(times, values, values)]
+        while len(self.levels[-1][0]) > type(self).MIN_SIZE:
+            level_times, minima, maxima = self.levels[-1]
+            starts = np.arange(0, len(level_times), factor)
+            self.levels.append((level_times[starts],
+                                np.minimum.reduceat(minima, starts),
+                                np.maximum.reduceat(maxima, starts)))
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    def level(self, count, points):
+        if count <= points:
+            return 0
+        return min(int(np.ceil(np.log(count / points) / np.log(self.factor))), len(self.levels) - 1)
+
+    def select(self, start=None, stop=None, points=MIN_SIZE):
+        times = self.levels[0][0]
+        low = int(np.searchsorted(times, start)) if start is not None else 0
+        high = int(np.searchsorted(times, stop, side='right')) if stop is not None else len(times)
+
+        level = self.level(high - low, points)
+        level_times, minima, maxima = self.levels[level]
+
+        # one bucket more on either side so the line runs on past the edges of the view
+        bucket = self.factor ** level
+        low = max(low // bucket - 1, 0)
+        high = min(-(-high // bucket) + 1, len(level_times))
+
+        if level == 0:
+            return level_times[low:high], minima[low:high]
+
+        # draw every bucket as a vertical stroke from its minimum to its maximum
+        return np.repeat(level_times[low:high], 2), np.column_stack((minima[low:high], maxima[low:high])).ravel()
@@ -1,41 +1,41 @@
-from DataPoint import DataPoint
+import numpy as np
+
+from SignalBuffer import SignalBuffer
 
 
 class Derivative:
     WINDOW_SIZE = 5
+    KERNEL = np.array([1, 2, 0, -2, -1])
 
-    def __init__(self, data_source):
-        self.data = []
+    def __init__(self, data_source, capacity=None):
+        self.data = SignalBuffer(capacity)
         self.data_source = data_source
+        self.cursor = 0
 
-    @classmethod
-    def transformation(cls, signal):
-        sampling_time = (signal[-1].time - signal[0].time) / (cls.WINDOW_SIZE - 1)
-        result = (-signal[0].value - 2*signal[1].value + 2*signal[3].value + signal[4].value) / (8 * sampling_time)
-        return DataPoint(time=signal[2].time, value=result)
-
-
-    def get_next_window(self):
-        if len(self.data_source.data) < type(self).WINDOW_SIZE:
-            return None
+    @property
+    def sample_rate(self):
+        return getattr(self.data_source, 'sample_rate', None)
 
-        if len(self.data) == 0:
-            return self.data_source.data[:type(self).WINDOW_SIZE]
-
-        last_time = self.data[-1].time
-
-        for i in range(len(self.data_source.data) - 1, -1, -1):
-            if self.data_source.data[i].time == last_time:
-                sliced = self.data_source.data[i-1:i+4]
-                if len(sliced) == type(self).WINDOW_SIZE:
-                    return sliced
-                return None
+    @classmethod
+    def transformation(cls, times, values, sample_rate=None):
+        # works along the last axis, so several channels can be stacked into one 2-D array
+        length = values.shape[-1] - cls.WINDOW_SIZE + 1
+        if sample_rate is not None:
+            sampling_times = 1 / sample_rate
+        else:
+            sampling_times = (times[..., cls.WINDOW_SIZE - 1:] - times[..., :length]) / (cls.WINDOW_SIZE - 1)
+        result = sum(weight * values[..., cls.WINDOW_SIZE - 1 - shift:cls.WINDOW_SIZE - 1 - shift + length]
+                     for shift, weight in enumerate(cls.KERNEL) if weight) / (8 * sampling_times)
+        center = cls.WINDOW_SIZE // 2
+        return times[..., center:center + length], result
 
     def update(self):
-        while True:
-            window = self.get_next_window()
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+        times, values = self.data_source.data.since(self.cursor)
 
-            if window is None:
-                return
+        if len(times) < type(self).WINDOW_SIZE:
+            return
 
-            self.data.append(type(self).transformation(window))
+        result_times, result_values = type(self).transformation(times, values, self.sample_rate)
+        self.data.extend(result_times, result_values)
+        self.cursor += len(result_times)
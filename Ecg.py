@@ -1,158 +1,157 @@
+import os
 import sys
+import argparse
 import time
 import datetime
+import importlib
+import threading
 
 import json
-import matplotlib.pyplot as plt
 from math import exp, sqrt
 
 from DataPoint import DataPoint
 from RawData import RawData
+from ReplayData import ReplayData
+from SyntheticData import SyntheticData
+from Resampling import Resampling
+from SignalQuality import SignalQuality
 from Butterworth import Butterworth
 from Equalizer import Equalizer
 from Derivative import Derivative
 from Squaring import Squaring
 from Integration import Integration
-from RPeaks import RPeaks
+from AdaptiveRPeaks import AdaptiveRPeaks
 from HeartRate import HeartRate
 from TimeIntervals import TimeIntervals
+from NormalIntervals import NormalIntervals
+from RunningStatistics import RunningStatistics
 from StandardDeviation import StandardDeviation
 from RMSSD import RMSSD
 from PRR50 import PRR50
+from SpectralAnalysis import SpectralAnalysis
 from SpectralPower import SpectralPower
+from Instrumentation import Instrumentation
+from Scheduler import Scheduler
+from SessionWriter import SessionWriter
+from Checkpoint import Checkpoint
 
 import numpy as np
 
 
 class ECG:
-    def __init__(self, serial_name):
+    STAGES = (
+        'raw_data',
+        'resampling',
+        'signal_quality',
+        'band_pass',
+        'derivative',
+        'squaring',
+        'integration',
+        'r_peaks',
+        'heart_rate',
+        'rr_intervals',
+        'sdrr',
+        'rmssd',
+        'prr50',
+        'lf',
+        'hf'
+    )
+
+    # stages run by the Scheduler once one of these inputs has produced new samples
+    INPUTS = {
+        'raw_data': (),
+        'resampling': ('raw_data',),
+        'signal_quality': ('resampling',),
+        'band_pass': ('resampling',),
+        'derivative': ('band_pass',),
+        'squaring': ('derivative',),
+        'integration': ('squaring',),
+        'r_peaks': ('integration', 'signal_quality'),
+        'heart_rate': ('r_peaks',),
+        'rr_intervals': ('r_peaks',),
+        'sdrr': ('rr_intervals',),
+        'rmssd': ('rr_intervals',),
+        'prr50': ('rr_intervals',),
+        'lf': ('rr_intervals',),
+        'hf': ('rr_intervals',)
+    }
+
+    HRV_BRANCH = ('heart_rate', 'rr_intervals', 'sdrr', 'rmssd', 'prr50', 'lf', 'hf')
+
+    def __init__(self, serial_name=None, capacity=None, spill_directory=None, raw_data=None, instrumentation=None,
+                 fs=None):
         self.start_time = time.time()
         self.start_timestamp = datetime.datetime.fromtimestamp(self.start_time).strftime('%Y-%m-%d %H:%M:%S')
 
-        self.raw_data = RawData(serial_name)
+        if spill_directory is not None:
+            spill_path = os.path.join(spill_directory, '{}.raw'.format(self.start_timestamp))
+        else:
+            spill_path = None
+
+        if raw_data is None:
+            raw_data = RawData(serial_name, capacity=capacity, spill_path=spill_path)
+
+        self.raw_data = raw_data
+        self.resampling = Resampling(self.raw_data, fs=fs, capacity=capacity)
+        self.signal_quality = SignalQuality(self.resampling, self.raw_data)
         # self.band_pass = Equalizer(self.raw_data, transfer_function=lambda frequency : 1 if abs(frequency) > 5 and abs(frequency) < 15 else 0 )
-        self.band_pass = Butterworth(self.raw_data, 5, 15)
-        self.derivative = Derivative(self.band_pass)
-        self.squaring = Squaring(self.derivative)
-        self.integration = Integration(self.squaring)
-        self.r_peaks = RPeaks(self.integration, self.band_pass)
+        self.band_pass = Butterworth(self.resampling, 5, 15, capacity=capacity, streaming=True)
+        self.derivative = Derivative(self.band_pass, capacity=capacity)
+        self.squaring = Squaring(self.derivative, capacity=capacity)
+        self.integration = Integration(self.squaring, step=1, capacity=capacity)
+        # integrated sample i lines up with band-pass sample i + delay
+        delay = Derivative.WINDOW_SIZE // 2 + self.integration.box_size - 1
+        self.r_peaks = AdaptiveRPeaks(self.integration, self.band_pass, delay=delay, quality=self.signal_quality)
         self.heart_rate = HeartRate(self.r_peaks)
-        self.rr_intervals = TimeIntervals(self.r_peaks)
-        self.sdrr = StandardDeviation(self.rr_intervals)
-        self.rmssd = RMSSD(self.rr_intervals)
-        self.prr50 = PRR50(self.rr_intervals)
-        self.lf = SpectralPower(self.rr_intervals, 0.04, 0.15)
-        self.hf = SpectralPower(self.rr_intervals, 0.15, 0.4)
+        self.rr_intervals = TimeIntervals(self.r_peaks, quality=self.signal_quality)
+        # HRV only sees normal-to-normal intervals, without ectopic beats and bad signal segments
+        self.nn_intervals = NormalIntervals(self.rr_intervals)
+        self.rr_statistics = RunningStatistics(self.nn_intervals)
+        self.sdrr = StandardDeviation(self.nn_intervals, statistics=self.rr_statistics)
+        self.rmssd = RMSSD(self.nn_intervals, statistics=self.rr_statistics)
+        self.prr50 = PRR50(self.nn_intervals, statistics=self.rr_statistics)
+        self.spectrum = SpectralAnalysis(self.nn_intervals, time_window=SpectralAnalysis.TIME_WINDOW)
+        self.lf = SpectralPower(self.nn_intervals, 0.04, 0.15, analysis=self.spectrum)
+        self.hf = SpectralPower(self.nn_intervals, 0.15, 0.4, analysis=self.spectrum)
+
+        self.instrumentation = instrumentation
+        self.session = None
 
     def update(self):
-        self.raw_data.update()
-        self.band_pass.update()
-        self.derivative.update()
-        self.squaring.update()
-        self.integration.update()
-        self.r_peaks.update()
-        self.heart_rate.update()
-        self.rr_intervals.update()
-        self.sdrr.update()
-        self.rmssd.update()
-        self.prr50.update()
-        self.lf.update()
-        self.hf.update()
+        if self.instrumentation is not None:
+            self.instrumentation.update(self)
+            return
+
+        for name in type(self).STAGES:
+            getattr(self, name).update()
+
+    def record(self, path=None, flush_interval=SessionWriter.FLUSH_INTERVAL):
+        if path is None:
+            path = '{}{}'.format(self.start_timestamp, SessionWriter.EXTENSION)
+        self.session = SessionWriter(path, self, flush_interval=flush_interval)
 
     def save(self):
+        if self.session is not None:
+            print("Saving data to {} ...".format(self.session.path))
+            self.session.close()
+            return
+
         print("Saving data to {}.json ...".format(self.start_timestamp))
 
         model = {
             'start_time': self.start_time,
-            'raw_data': self.raw_data.data,
-            'r_peaks': self.r_peaks.data,
-            'heart_rate': self.heart_rate.data
+            'raw_data': self.raw_data.data.tolist(),
+            'r_peaks': self.r_peaks.data.tolist(),
+            'heart_rate': self.heart_rate.data.tolist()
         }
 
         with open('{}.json'.format(self.start_timestamp), 'w') as outfile:
             json.dump(model, outfile)
 
     def plot(self):
-        X = [data_point.time for data_point in self.raw_data.data]
-        Y = [data_point.value for data_point in self.raw_data.data]
-
-        plt.plot(X, Y)
-
-        X = [data_point.time for data_point in self.r_peaks.data]
-        max_y = max(Y)
-        min_y = min(Y)
-
-        for r_time in X:
-            plt.plot([r_time, r_time], [min_y, max_y], "b")
-
-
-        plt.figure()
-
-        X = [data_point.time for data_point in self.band_pass.data]
-        Y = [data_point.value for data_point in self.band_pass.data]
-
-        plt.plot(X, Y)
-
-        X = [data_point.time for data_point in self.r_peaks.data]
-        max_y = max(Y)
-        min_y = min(Y)
-
-        for r_time in X:
-            plt.plot([r_time, r_time], [min_y, max_y], "b")
-
-        # plt.figure()
-        #
-        # X = [data_point.time for data_point in self.integration.data]
-        # Y = [data_point.value for data_point in self.integration.data]
-        #
-        # plt.plot(X, Y)
-
-        plt.figure()
-
-        X = [data_point.time for data_point in self.heart_rate.data]
-        Y = [data_point.value for data_point in self.heart_rate.data]
-
-        plt.plot(X, Y)
-
-        plt.figure()
-
-        X_sdrr = [data_point.time for data_point in self.sdrr.data]
-        Y_sdrr = [data_point.value for data_point in self.sdrr.data]
-        X_rmssd = [data_point.time for data_point in self.rmssd.data]
-        Y_rmssd = [data_point.value for data_point in self.rmssd.data]
-
-        plt.plot(X_sdrr, Y_sdrr, label="sdrr")
-        plt.plot(X_rmssd, Y_rmssd, label="rmssd")
-        plt.legend(loc='upper left')
-
-        plt.figure()
-
-        X = [data_point.time for data_point in self.prr50.data]
-        Y = [data_point.value for data_point in self.prr50.data]
-
-        plt.plot(X, Y)
-
-        plt.figure()
-
-        X_lf = [data_point.time for data_point in self.lf.data]
-        Y_lf = [data_point.value for data_point in self.lf.data]
-        X_hf = [data_point.time for data_point in self.hf.data]
-        Y_hf = [data_point.value for data_point in self.hf.data]
-
-        plt.plot(X_hf, Y_hf)
-        plt.plot(X_lf, Y_lf)
-        plt.plot(X_hf, [(lf/hf if hf > 0 else 0) for lf,hf in zip(Y_lf, Y_hf)])
-
-        # plt.figure()
-        #
-        # time_intervals = TimeIntervals(self.raw_data)
-        # time_intervals.update()
-        #
-        # intervals = [dp.value for dp in time_intervals.data]
-        #
-        # plt.hist(intervals, bins=np.linspace(min(intervals),max(intervals),100))
-
-        plt.show()
+        # matplotlib is only imported when there is something to show, headless runs never load it
+        from Plotter import Plotter
+        Plotter(self).show()
 
 
 if __name__ == "__main__":
@@ -162,13 +161,91 @@ if __name__ == "__main__":
     else:
         serial_name = "/dev/ttyACM0"
 
-    ecg = ECG(serial_name)
+    parser = argparse.ArgumentParser(description="Record and analyse an ECG")
+    parser.add_argument('serial_name', nargs='?', default=serial_name)
+    parser.add_argument('--replay', metavar='RECORDING', help="replay a recording instead of reading the serial port")
+    parser.add_argument('--synthetic', action='store_true', help="analyse a synthetic ECG instead of the serial port")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed, 0 runs as fast as possible")
+    parser.add_argument('--threads', action='store_true', help="run the HRV metrics in a worker thread")
+    parser.add_argument('--profile', action='store_true', help="record per-stage timings and print a periodic summary")
+    parser.add_argument('--summary-interval', type=float, default=60, help="seconds between profiling summaries")
+    parser.add_argument('--metrics-file', help="write Prometheus metrics to this file with every summary")
+    parser.add_argument('--metrics-port', type=int, help="serve Prometheus metrics on this local port")
+    parser.add_argument('--dashboard', action='store_true', help="show a live dashboard while recording")
+    parser.add_argument('--headless', action='store_true', help="render without a display and skip the final plots")
+    parser.add_argument('--dashboard-output', help="save the last dashboard frame to this image")
+    parser.add_argument('--checkpoint', metavar='DIRECTORY', help="periodically save the pipeline state to this directory")
+    parser.add_argument('--checkpoint-interval', type=float, default=Checkpoint.INTERVAL, help="seconds between checkpoints")
+    parser.add_argument('--resume', action='store_true', help="continue from the state saved in the checkpoint directory")
+    parser.add_argument('--json', action='store_true', help="save the session as json at the end instead of recording it")
+    parser.add_argument('--flush-interval', type=float, default=SessionWriter.FLUSH_INTERVAL,
+                        help="seconds between writes to the session file")
+    arguments = parser.parse_args()
+
+    if arguments.checkpoint is not None and arguments.threads:
+        parser.error("--checkpoint needs all stages on one thread, it cannot be combined with --threads")
+    if arguments.resume and arguments.checkpoint is None:
+        parser.error("--resume needs --checkpoint")
+
+    speed = arguments.speed if arguments.speed > 0 else None
+
+    instrumentation = None
+    if arguments.profile or arguments.metrics_file is not None or arguments.metrics_port is not None:
+        instrumentation = Instrumentation(ECG.STAGES, arguments.summary_interval, arguments.metrics_file,
+                                          arguments.metrics_port)
+
+    if arguments.replay is not None:
+        ecg = ECG(raw_data=ReplayData.from_file(arguments.replay, speed=speed), instrumentation=instrumentation)
+    elif arguments.synthetic:
+        ecg = ECG(raw_data=SyntheticData(speed=speed), instrumentation=instrumentation)
+    else:
+        ecg = ECG(arguments.serial_name, instrumentation=instrumentation)
+
+    checkpoint = None
+    if arguments.checkpoint is not None:
+        checkpoint = Checkpoint(ecg, arguments.checkpoint, arguments.checkpoint_interval)
+        if arguments.resume and checkpoint.restore():
+            print("Resumed at {} samples from {}".format(len(ecg.raw_data.data), arguments.checkpoint))
+
+    if not arguments.json:
+        ecg.record(flush_interval=arguments.flush_interval)
+
+    branches = (ECG.HRV_BRANCH,) if arguments.threads else ()
+    scheduler = Scheduler(ecg, branches=branches, threaded=arguments.threads)
+
+    dashboard = None
+    if arguments.dashboard:
+        from Dashboard import Dashboard
+        dashboard = Dashboard(ecg, headless=arguments.headless, output=arguments.dashboard_output)
+        dashboard.start()
+
+    ecg.raw_data.start()
+    # the filters need scipy.signal, it is loaded in the background while the first samples arrive
+    threading.Thread(target=importlib.import_module, args=('scipy.signal',), name="Preload", daemon=True).start()
+    scheduler.start()
 
     try:
-        while True:
-            ecg.update()
+        while not getattr(ecg.raw_data, 'finished', False):
+            scheduler.step()
+            if ecg.session is not None:
+                ecg.session.update()
+            if dashboard is not None:
+                dashboard.update()
+            if checkpoint is not None:
+                checkpoint.update()
     except KeyboardInterrupt as e:
         pass
     finally:
+        ecg.raw_data.stop()
+        scheduler.stop()
+        if checkpoint is not None:
+            checkpoint.close()
+        if instrumentation is not None:
+            print(instrumentation.summary())
+            instrumentation.close()
+        if dashboard is not None:
+            dashboard.stop()
+            print("Dashboard frames sent: {}, dropped: {}".format(dashboard.frames, dashboard.dropped_frames))
         ecg.save()
-        ecg.plot()
+        if not arguments.headless:
+            ecg.plot()
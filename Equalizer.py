@@ -1,41 +1,136 @@
 import numpy as np
 
-from DataPoint import DataPoint
+from SignalBuffer import SignalBuffer
 
 
 class Equalizer:
     WINDOW_SIZE = 512
 
-    def __init__(self, data_source, transfer_function):
-        self.data = []
+    # length of the designed FIR in seconds, and FFT size as a multiple of the FIR length
+    FIR_DURATION = 0.5
+    FFT_FACTOR = 4
+
+    @staticmethod
+    def calculate_frequency(times):
+        return len(times) / (times[-1] - times[0])
+
+    def __init__(self, data_source, transfer_function=None, capacity=None, fir=None, fs=None, fft_size=None):
+        if (transfer_function is None) == (fir is None):
+            raise ValueError("Either a transfer function or FIR coefficients are needed")
+
+        self.data = SignalBuffer(capacity)
         self.data_source = data_source
         self.transfer_function = transfer_function
+        self.fs = fs
+        self.fft_size = fft_size
+
+        # (fir, fft size, spectrum) by sampling rate, the transfer function is only evaluated once per rate
+        self.designs = {}
+        self.fir = np.asarray(fir, dtype=float) if fir is not None else None
+
+        self.frequency = None
+        self.spectrum = None
+        self.tail = None
+
+        # input index where filtering started, next input index to filter and number of filtered samples
+        self.start = None
+        self.cursor = 0
+        self.produced = 0
+
+    @property
+    def delay(self):
+        # a linear phase FIR delays by half its length, the output is moved back by as much
+        return (len(self.fir) - 1) // 2
+
+    @property
+    def block_size(self):
+        return self.fft_size - len(self.fir) + 1
 
-    @classmethod
-    def index_to_freq(cls, index, mean_time):
-        index = index % cls.WINDOW_SIZE
-        nyquist_freq = 1 / (2*mean_time)
+    @property
+    def nominal_frequency(self):
+        return self.fs if self.fs is not None else getattr(self.data_source, 'sample_rate', None)
 
-        if index <= cls.WINDOW_SIZE / 2:
-            return nyquist_freq * index / (cls.WINDOW_SIZE / 2)
-        else:
-            return nyquist_freq * ( (index - cls.WINDOW_SIZE / 2) / (cls.WINDOW_SIZE / 2) - 1 )
+    def response(self, freqs):
+        try:
+            response = np.asarray(self.transfer_function(freqs))
+        except (TypeError, ValueError):
+            response = None
+
+        if response is None or response.shape != freqs.shape:
+            # a transfer function written for a single frequency
+            response = np.array([self.transfer_function(frequency) for frequency in freqs.tolist()])
+        return response
+
+    def design(self, fs):
+        if fs in self.designs:
+            return self.designs[fs]
+
+        fir = self.fir if self.transfer_function is None else None
+        if fir is None:
+            # frequency sampling: the zero phase impulse response of the transfer function, centred and windowed
+            taps = 2 * int(type(self).FIR_DURATION * fs / 2) + 1
+            impulse = np.fft.irfft(self.response(np.fft.rfftfreq(taps, 1 / fs)), taps)
+            fir = np.roll(impulse, taps // 2) * np.hamming(taps)
+
+        fft_size = self.fft_size
+        if fft_size is None:
+            fft_size = 2 ** int(np.ceil(np.log2(type(self).FFT_FACTOR * len(fir))))
+        elif fft_size <= len(fir):
+            # a size up to the FIR length leaves no room for a block of new samples, it is rounded up
+            fft_size = 2 ** int(np.ceil(np.log2(2 * len(fir))))
+        self.designs[fs] = (fir, fft_size, np.fft.rfft(fir, fft_size))
+        return self.designs[fs]
+
+    def initialize(self):
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+        times, values = self.data_source.data.window(self.cursor, self.cursor + type(self).WINDOW_SIZE)
+
+        self.frequency = self.nominal_frequency
+        if self.frequency is None:
+            self.frequency = type(self).calculate_frequency(times)
+        self.fir, self.fft_size, self.spectrum = self.design(self.frequency)
+
+        # start as if the signal had been at its first value forever
+        self.tail = values[0] * (np.sum(self.fir) - np.cumsum(self.fir)[:-1])
+        self.start = self.cursor
 
     def update(self):
-        if len(self.data_source.data) < type(self).WINDOW_SIZE:
+        if self.spectrum is None:
+            required = 1 if self.nominal_frequency is not None else type(self).WINDOW_SIZE
+            if len(self.data_source.data) - max(self.cursor, self.data_source.data.first_index) < required:
+                return
+            self.initialize()
+
+        blocks = (len(self.data_source.data) - self.cursor) // self.block_size
+        if blocks == 0:
             return
 
-        filtered_data = self.data_source.data[-type(self).WINDOW_SIZE:]
-        index_base = int(len(filtered_data)/2)
+        _, values = self.data_source.data.window(self.cursor, self.cursor + blocks * self.block_size)
 
-        mean_time = (filtered_data[-1].time - filtered_data[0].time)/len(filtered_data)
-        frequency_resolution = 1/(mean_time * type(self).WINDOW_SIZE)
+        # overlap-add: all blocks in one rfft, the tail of every block is added to the start of the next ones
+        segments = values.reshape(blocks, self.block_size)
+        filtered = np.fft.irfft(np.fft.rfft(segments, self.fft_size, axis=-1) * self.spectrum, self.fft_size, axis=-1)
 
-        mean_value = np.mean([data.value for data in filtered_data])
+        # a block shorter than the FIR spreads its tail over several following blocks
+        pieces = -(-self.fft_size // self.block_size)
+        filtered = np.pad(filtered, ((0, 0), (0, pieces * self.block_size - self.fft_size)))
+        filtered = filtered.reshape(blocks, pieces, self.block_size)
+        summed = np.zeros((blocks + pieces - 1, self.block_size))
+        for piece in range(pieces):
+            summed[piece:piece + blocks] += filtered[:, piece]
 
-        fft = np.fft.fft(np.array([data.value - mean_value for data in filtered_data]))
+        overlap = len(self.fir) - 1
+        summed = summed.ravel()
+        summed[:overlap] += self.tail
+        output = summed[:blocks * self.block_size]
+        self.tail = summed[len(output):len(output) + overlap].copy()
 
-        fft = np.array([value * self.transfer_function(type(self).index_to_freq(index, mean_time)) for index, value in enumerate(fft)])
-        ifft = np.fft.ifft(fft)
+        first = self.produced
+        self.produced += output.size
+        self.cursor += output.size
 
-        self.data.append(DataPoint(time=filtered_data[index_base].time, value=ifft[index_base].real))
+        # output sample n belongs to input sample n - delay, the first delay samples precede the start
+        skip = max(self.delay - first, 0)
+        times, _ = self.data_source.data.window(self.start + first + skip - self.delay,
+                                                self.start + self.produced - self.delay)
+        self.data.extend(times, output.ravel()[skip:])
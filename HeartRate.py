@@ -1,35 +1,64 @@
-from DataPoint import DataPoint
+import numpy as np
+
+from SignalBuffer import SignalBuffer
 
 
 class HeartRate:
+    DEFAULT_HEART_RATE = 60
+
     def __init__(self, data_source, number_of_peaks=10):
-        self.data = []
+        self.data = SignalBuffer()
+        self.instantaneous = SignalBuffer()
         self.data_source = data_source
         self.number_of_peaks = number_of_peaks
 
+        # index of the next R peak of the data source to compute the heart rate for
+        self.cursor = 0
+
     @staticmethod
     def calculate_heart_rate(data):
         if(len(data) < 2):
-            return 60
+            return HeartRate.DEFAULT_HEART_RATE
 
         time_distance = data[-1].time - data[0].time
-        print(60 * (len(data) - 1) / time_distance)
         return 60 * (len(data) - 1) / time_distance
 
+    def over(self, beats=None, seconds=None, until=None):
+        # heart rate over the last beats RR intervals and/or seconds before until, looked up in the R peak times
+        peaks = self.data_source.data
+        stop = len(peaks) if until is None else peaks.search(until, side='right')
+        start = peaks.first_index
+
+        if beats is not None:
+            start = max(start, stop - beats - 1)
+        if seconds is not None and stop > start:
+            last_time = peaks.window(stop - 1, stop)[0][0]
+            start = max(start, peaks.search(last_time - seconds))
+
+        times, _ = peaks.window(start, stop)
+        if len(times) < 2:
+            return type(self).DEFAULT_HEART_RATE
+        return 60 * (len(times) - 1) / (times[-1] - times[0])
+
     def update(self):
-        if len(self.data) and self.data[-1].time == self.data_source.data[-1].time:
+        first = max(self.cursor - self.number_of_peaks, self.data_source.data.first_index)
+        times, _ = self.data_source.data.since(first)
+
+        indices = np.arange(max(self.cursor, first), first + len(times))
+        if len(indices) == 0:
             return
 
+        # every R peak gets the average over the number_of_peaks peaks before it
+        starts = np.maximum(indices - self.number_of_peaks, first)
+        counts = indices - starts
+        averaged = counts >= 2
 
-        last_time = self.data[-1].time if len(self.data) else 0
+        rates = np.full(len(indices), float(type(self).DEFAULT_HEART_RATE))
+        rates[averaged] = 60 * (counts[averaged] - 1) \
+            / (times[indices[averaged] - 1 - first] - times[starts[averaged] - first])
+        self.data.extend(times[indices - first], rates)
 
-        for index, r_peak in enumerate(self.data_source.data):
-            if r_peak.time > last_time:
+        following = indices[indices > first]
+        self.instantaneous.extend(times[following - first], 60 / (times[following - first] - times[following - 1 - first]))
 
-                start_index = index - self.number_of_peaks if index > self.number_of_peaks else 0
-                self.data.append(
-                    DataPoint(time=r_peak.time,
-                              value=HeartRate.calculate_heart_rate(self.data_source.data[start_index:index])
-                    )
-                )
-                last_time = r_peak.time
+        self.cursor = first + len(times)
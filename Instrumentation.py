@@ -0,0 +1,204 @@
+import os
+import time
+import bisect
+import threading
+
+
+class Histogram:
+    LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, quantile):
+        if self.count == 0:
+            return 0.0
+
+        target = quantile * self.count
+        cumulative = 0
+        for bucket, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bucket
+        return float('inf')
+
+    def prometheus(self, name, labels=""):
+        separator = "," if labels else ""
+        suffix = "{{{}}}".format(labels) if labels else ""
+        lines = []
+        cumulative = 0
+        for bucket, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append('{}_bucket{{{}{}le="{}"}} {}'.format(name, labels, separator, bucket, cumulative))
+        lines.append('{}_bucket{{{}{}le="+Inf"}} {}'.format(name, labels, separator, self.count))
+        lines.append('{}_sum{} {}'.format(name, suffix, self.sum))
+        lines.append('{}_count{} {}'.format(name, suffix, self.count))
+        return lines
+
+
+class Instrumentation:
+    ACQUISITION_COUNTERS = ('dropped_bytes', 'invalid_lines', 'out_of_range', 'overruns', 'lead_off_samples')
+
+    def __init__(self, stages, summary_interval=None, dump_path=None, port=None):
+        self.stages = stages
+        self.summary_interval = summary_interval
+        self.dump_path = dump_path
+
+        self.update_time = {name: Histogram() for name in stages}
+        self.samples_in = dict.fromkeys(stages, 0)
+        self.samples_out = dict.fromkeys(stages, 0)
+        self.backlog = dict.fromkeys(stages, 0)
+        self.input_lengths = dict.fromkeys(stages, 0)
+        self.end_to_end = Histogram()
+        self.r_peak_latency = Histogram()
+        self.acquisition = {}
+        self.queue_depth = 0
+        self.updates = 0
+
+        # wall clock minus sample time, the smallest value seen is the least delayed sample
+        self.clock_offset = None
+        self.last_summary = time.time()
+
+        self.server = None
+        if port is not None:
+            self.serve(port)
+
+    def run_stage(self, ecg, name):
+        stage = getattr(ecg, name)
+        data_source = getattr(stage, 'data_source', None)
+        output_length = len(stage.data)
+
+        stage_start = time.perf_counter()
+        stage.update()
+        self.update_time[name].observe(time.perf_counter() - stage_start)
+
+        if data_source is not None:
+            self.samples_in[name] += len(data_source.data) - self.input_lengths[name]
+            self.input_lengths[name] = len(data_source.data)
+            if hasattr(stage, 'cursor'):
+                self.backlog[name] = len(data_source.data) - stage.cursor
+        self.samples_out[name] += len(stage.data) - output_length
+
+        if name == 'raw_data':
+            self.samples_in[name] += len(stage.data) - output_length
+            self.observe_acquisition(stage)
+        elif name == 'r_peaks':
+            self.observe_r_peaks(stage, len(stage.data) - output_length)
+
+    def update(self, ecg):
+        update_start = time.perf_counter()
+
+        for name in self.stages:
+            self.run_stage(ecg, name)
+
+        self.finish_update(time.perf_counter() - update_start)
+
+    def finish_update(self, elapsed):
+        self.end_to_end.observe(elapsed)
+        self.updates += 1
+
+        if self.summary_interval is not None and time.time() - self.last_summary >= self.summary_interval:
+            self.last_summary = time.time()
+            print(self.summary())
+            if self.dump_path is not None:
+                self.dump(self.dump_path)
+
+    def observe_acquisition(self, raw_data):
+        if len(raw_data.data):
+            offset = time.time() - raw_data.data[-1].time
+            self.clock_offset = offset if self.clock_offset is None else min(self.clock_offset, offset)
+
+        self.queue_depth = getattr(raw_data, 'queue_depth', 0)
+        for counter in type(self).ACQUISITION_COUNTERS:
+            if hasattr(raw_data, counter):
+                self.acquisition[counter] = getattr(raw_data, counter)
+
+    def observe_r_peaks(self, r_peaks, new_peaks):
+        if new_peaks <= 0 or self.clock_offset is None:
+            return
+
+        now = time.time()
+        times, _ = r_peaks.data.since(len(r_peaks.data) - new_peaks)
+        for peak_time in times.tolist():
+            self.r_peak_latency.observe(max(now - (peak_time + self.clock_offset), 0.0))
+
+    def summary(self):
+        lines = ["{} updates, ECG.update p50 {:.3g} s p99 {:.3g} s, R-peak latency p50 {:.3g} s, queue depth {}".format(
+            self.updates, self.end_to_end.quantile(0.5), self.end_to_end.quantile(0.99),
+            self.r_peak_latency.quantile(0.5), self.queue_depth)]
+
+        for name in self.stages:
+            histogram = self.update_time[name]
+            lines.append("    {:<14} total {:8.3f} s  p99 {:.3g} s  in {:>9}  out {:>9}  backlog {}".format(
+                name, histogram.sum, histogram.quantile(0.99), self.samples_in[name], self.samples_out[name],
+                self.backlog[name]))
+
+        return "\n".join(lines)
+
+    def prometheus(self):
+        lines = [
+            "# TYPE ecg_stage_update_seconds histogram",
+        ]
+        for name in self.stages:
+            lines += self.update_time[name].prometheus("ecg_stage_update_seconds", 'stage="{}"'.format(name))
+
+        for metric, values in (("ecg_stage_samples_in_total", self.samples_in),
+                               ("ecg_stage_samples_out_total", self.samples_out)):
+            lines.append("# TYPE {} counter".format(metric))
+            lines += ['{}{{stage="{}"}} {}'.format(metric, name, values[name]) for name in self.stages]
+
+        lines.append("# TYPE ecg_stage_backlog_samples gauge")
+        lines += ['ecg_stage_backlog_samples{{stage="{}"}} {}'.format(name, self.backlog[name]) for name in self.stages]
+
+        lines.append("# TYPE ecg_update_seconds histogram")
+        lines += self.end_to_end.prometheus("ecg_update_seconds")
+        lines.append("# TYPE ecg_r_peak_latency_seconds histogram")
+        lines += self.r_peak_latency.prometheus("ecg_r_peak_latency_seconds")
+
+        lines.append("# TYPE ecg_acquisition_queue_depth gauge")
+        lines.append("ecg_acquisition_queue_depth {}".format(self.queue_depth))
+        for counter, value in sorted(self.acquisition.items()):
+            lines.append("# TYPE ecg_acquisition_{}_total counter".format(counter))
+            lines.append("ecg_acquisition_{}_total {}".format(counter, value))
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'w') as outfile:
+            outfile.write(self.prometheus())
+        os.replace(temporary_path, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+
+        instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = instrumentation.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = HTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, name="Instrumentation", daemon=True).start()
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
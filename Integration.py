@@ -1,40 +1,30 @@
-from DataPoint import DataPoint
+import numpy as np
+
+from SignalBuffer import SignalBuffer
 
 
 class Integration:
 
-    def __init__(self, data_source, box_size=30):
-        self.data = []
+    def __init__(self, data_source, box_size=30, step=None, capacity=None):
+        self.data = SignalBuffer(capacity)
         self.data_source = data_source
         self.box_size = box_size
+        self.step = step if step is not None else box_size
+        self.cursor = 0
 
-    @classmethod
-    def transformation(cls, signal):
-        result = sum([data.value for data in signal]) / len(signal)
-        return DataPoint(time=signal[-1].time, value=result)
-
-
-    def get_next_window(self):
-        if len(self.data_source.data) < self.box_size:
-            return None
-
-        if len(self.data) == 0:
-            return self.data_source.data[:self.box_size]
-
-        last_time = self.data[-1].time
-
-        for i in range(len(self.data_source.data) - 1, -1, -1):
-            if self.data_source.data[i].time == last_time:
-                sliced = self.data_source.data[i + 1:i + 1 + self.box_size]
-                if len(sliced) == self.box_size:
-                    return sliced
-                return None
+    def transformation(self, times, values):
+        cumulative = np.cumsum(values, axis=-1)
+        cumulative = np.concatenate((np.zeros(cumulative.shape[:-1] + (1,)), cumulative), axis=-1)
+        ends = np.arange(self.box_size, values.shape[-1] + 1, self.step)
+        return times[..., ends - 1], (cumulative[..., ends] - cumulative[..., ends - self.box_size]) / self.box_size
 
     def update(self):
-        while True:
-            window = self.get_next_window()
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+        times, values = self.data_source.data.since(self.cursor)
 
-            if window is None:
-                return
+        if len(times) < self.box_size:
+            return
 
-            self.data.append(type(self).transformation(window))
+        result_times, result_values = self.transformation(times, values)
+        self.data.extend(result_times, result_values)
+        self.cursor += len(result_times) * self.step
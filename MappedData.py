@@ -0,0 +1,59 @@
+import copy
+import os
+
+import numpy as np
+
+from DataSource import DataSource
+from SignalBuffer import SignalBuffer
+
+
+class MappedData(DataSource):
+    DTYPE = SignalBuffer.SPILL_DTYPE
+    INDEX_STRIDE = 4096
+
+    def __init__(self, path, start=None, stop=None, start_time=None):
+        super().__init__()
+        self.path = path
+        self.start_time = start_time
+
+        # a raw capture of (time, value) pairs as written by the SignalBuffer spill, an incomplete last pair is ignored
+        count = os.path.getsize(path) // (2 * np.dtype(type(self).DTYPE).itemsize)
+        if count:
+            self.samples = np.asarray(np.memmap(path, dtype=type(self).DTYPE, mode='r', shape=(count, 2)))
+        else:
+            self.samples = np.zeros((0, 2), dtype=type(self).DTYPE)
+
+        # every INDEX_STRIDE-th time, small enough to keep in memory for recordings of any length
+        self.index = np.array(self.samples[::type(self).INDEX_STRIDE, 0])
+
+        self.data = SignalBuffer.wrap(*self.view(start, stop))
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def time_range(self):
+        if len(self.samples) == 0:
+            return None
+        return float(self.samples[0, 0]), float(self.samples[-1, 0])
+
+    def locate(self, time, side='left'):
+        # the sparse index narrows the search down to one stride of the mapped file
+        block = int(np.searchsorted(self.index, time, side=side))
+        low = max(block - 1, 0) * type(self).INDEX_STRIDE
+        high = min(block * type(self).INDEX_STRIDE + 1, len(self.samples))
+        return low + int(np.searchsorted(self.samples[low:high, 0], time, side=side))
+
+    def view(self, start=None, stop=None):
+        low = self.locate(start) if start is not None else 0
+        high = self.locate(stop) if stop is not None else len(self.samples)
+        return self.samples[low:high, 0], self.samples[low:high, 1]
+
+    def segment(self, start=None, stop=None):
+        # shares the mapping and the index, only the data buffer is new
+        segment = copy.copy(self)
+        segment.data = SignalBuffer.wrap(*self.view(start, stop))
+        return segment
+
+    def update(self):
+        pass
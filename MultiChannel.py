@@ -0,0 +1,196 @@
+import argparse
+import time
+
+import numpy as np
+
+from Ecg import ECG
+from RawData import RawData
+from ReplayData import ReplayData
+from SyntheticData import SyntheticData
+from Derivative import Derivative
+from Scheduler import Scheduler
+
+
+class MultiChannel:
+    WAIT_TIMEOUT = 0.1
+
+    # stages run once for all channels on stacked 2-D arrays, in pipeline order
+    BATCHED_STAGES = ('band_pass', 'derivative', 'squaring', 'integration')
+
+    def __init__(self, sources, fs=None, capacity=None):
+        # every channel is a complete ECG, so R peaks and HRV metrics stay separate per channel
+        self.channels = [ECG(raw_data=source, capacity=capacity, fs=fs) for source in sources]
+        self.schedulers = [Scheduler(ecg) for ecg in self.channels]
+        first_batched = ECG.STAGES.index(type(self).BATCHED_STAGES[0])
+        self.upstream = ECG.STAGES[:first_batched]
+        self.downstream = [name for name in ECG.STAGES[first_batched:] if name not in type(self).BATCHED_STAGES]
+
+        self.steps = 0
+        self.batches = dict.fromkeys(type(self).BATCHED_STAGES, 0)
+        self.batched_samples = dict.fromkeys(type(self).BATCHED_STAGES, 0)
+
+    @property
+    def signal_time(self):
+        return min(ecg.raw_data.data.times[-1] if len(ecg.raw_data.data) else 0 for ecg in self.channels)
+
+    @property
+    def finished(self):
+        return all(getattr(ecg.raw_data, 'finished', False) for ecg in self.channels)
+
+    @staticmethod
+    def minimum(name, stage):
+        if name == 'derivative':
+            return Derivative.WINDOW_SIZE
+        if name == 'integration':
+            return stage.box_size
+        return 1
+
+    @classmethod
+    def ready(cls, name, stage):
+        return len(stage.data_source.data) - stage.cursor >= cls.minimum(name, stage)
+
+    @staticmethod
+    def batch_key(name, stage):
+        # channels can only share one operation if their stages are configured alike
+        if name == 'band_pass':
+            return stage.sos.tobytes() if stage.sos is not None else None
+        if name == 'derivative':
+            return name, stage.sample_rate
+        if name == 'integration':
+            return stage.box_size, stage.step
+        return name
+
+    def group(self, name):
+        groups = {}
+        for ecg in self.channels:
+            stage = getattr(ecg, name)
+            key = type(self).batch_key(name, stage)
+            if key is not None and type(self).ready(name, stage):
+                groups.setdefault(key, []).append(stage)
+        return [stages for stages in groups.values() if len(stages) > 1]
+
+    @staticmethod
+    def stack(stages):
+        inputs = [stage.data_source.data.since(stage.cursor) for stage in stages]
+        length = min(len(times) for times, _ in inputs)
+        times = np.stack([times[:length] for times, _ in inputs])
+        values = np.stack([values[:length] for _, values in inputs])
+        return times, values
+
+    @staticmethod
+    def transform(name, stages, times, values):
+        if name == 'band_pass':
+            from scipy.signal import sosfilt
+            zi = np.stack([stage.zi for stage in stages], axis=1)
+            values, zi = sosfilt(stages[0].sos, values, axis=-1, zi=zi)
+            for channel, stage in enumerate(stages):
+                stage.zi = zi[:, channel].copy()
+            return times, values, times.shape[-1]
+
+        if name == 'squaring':
+            return times, values**2, times.shape[-1]
+
+        if name == 'derivative':
+            times, values = stages[0].transformation(times, values, stages[0].sample_rate)
+            return times, values, times.shape[-1]
+
+        times, values = stages[0].transformation(times, values)
+        if name == 'integration':
+            return times, values, times.shape[-1] * stages[0].step
+        return times, values, times.shape[-1]
+
+    def run_batched(self, name):
+        for stages in self.group(name):
+            times, values = type(self).stack(stages)
+            times, values, consumed = type(self).transform(name, stages, times, values)
+
+            for channel, stage in enumerate(stages):
+                stage.data.extend(times[channel], values[channel])
+                stage.cursor += consumed
+
+            self.batches[name] += 1
+            self.batched_samples[name] += consumed * len(stages)
+
+        # the ragged rest, and channels that could not join a batch, are handled by the stages themselves
+        for ecg in self.channels:
+            stage = getattr(ecg, name)
+            if type(self).ready(name, stage):
+                stage.update()
+
+    def wait(self, timeout):
+        for ecg in self.channels:
+            ecg.raw_data.wait(timeout / len(self.channels))
+
+    def step(self):
+        self.wait(type(self).WAIT_TIMEOUT)
+
+        for ecg in self.channels:
+            for name in self.upstream:
+                getattr(ecg, name).update()
+
+        for name in type(self).BATCHED_STAGES:
+            self.run_batched(name)
+
+        for scheduler in self.schedulers:
+            scheduler.run_stages(self.downstream)
+
+        self.steps += 1
+
+    def start(self):
+        for ecg in self.channels:
+            ecg.raw_data.start()
+
+    def stop(self):
+        for ecg in self.channels:
+            ecg.raw_data.stop()
+
+    def summary(self):
+        lines = ["{:>8} {:>10} {:>8} {:>10} {:>10}".format('channel', 'samples', 'r_peaks', 'heart_rate', 'rmssd')]
+        for channel, ecg in enumerate(self.channels):
+            heart_rate = ecg.heart_rate.data[-1].value if len(ecg.heart_rate.data) else float('nan')
+            rmssd = ecg.rmssd.data[-1].value if len(ecg.rmssd.data) else float('nan')
+            lines.append("{:>8} {:>10} {:>8} {:>10.1f} {:>10.4f}".format(
+                channel, len(ecg.raw_data.data), len(ecg.r_peaks.data), heart_rate, rmssd))
+
+        for name in type(self).BATCHED_STAGES:
+            lines.append("{}: {} batches, {} samples".format(name, self.batches[name], self.batched_samples[name]))
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse several ECG channels in one process")
+    parser.add_argument('serial_names', nargs='*', help="serial ports, one channel each")
+    parser.add_argument('--replay', metavar='RECORDING', nargs='+', default=[], help="recordings to replay, one channel each")
+    parser.add_argument('--synthetic', type=int, default=0, metavar='CHANNELS', help="number of synthetic channels")
+    parser.add_argument('--duration', type=float, help="stop after this many seconds of signal")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed, 0 runs as fast as possible")
+    parser.add_argument('--fs', type=float, help="nominal sampling rate shared by all channels")
+    arguments = parser.parse_args()
+
+    speed = arguments.speed if arguments.speed > 0 else None
+
+    sources = [RawData(serial_name) for serial_name in arguments.serial_names]
+    sources += [ReplayData.from_file(path, speed=speed) for path in arguments.replay]
+    sources += [SyntheticData(speed=speed, heart_rate=60 + 2 * channel, seed=channel)
+                for channel in range(arguments.synthetic)]
+
+    if not sources:
+        parser.error("no channels given")
+
+    host = MultiChannel(sources, fs=arguments.fs)
+    host.start()
+
+    start = time.perf_counter()
+    try:
+        while not host.finished:
+            host.step()
+            if arguments.duration is not None and host.signal_time >= arguments.duration:
+                break
+    except KeyboardInterrupt as e:
+        pass
+    finally:
+        host.stop()
+
+    elapsed = time.perf_counter() - start
+    print(host.summary())
+    print("{} channels, {} steps in {:.2f} s".format(len(host.channels), host.steps, elapsed))
@@ -0,0 +1,8 @@
+class NormalIntervals:
+
+    def __init__(self, time_intervals):
+        self.data_source = time_intervals
+        self.data = time_intervals.normal
+
+    def update(self):
+        self.data_source.update()
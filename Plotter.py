@@ -0,0 +1,66 @@
+import matplotlib.pyplot as plt
+
+from Decimation import Decimation
+
+
+class Plotter:
+    R_PEAK_COLOR = 'b'
+
+    def __init__(self, ecg):
+        self.ecg = ecg
+        self.lines = []
+        self.connected = set()
+
+    @staticmethod
+    def points(axes):
+        # two points per pixel column is all a min/max line can show
+        return max(2 * int(axes.bbox.width), Decimation.MIN_SIZE)
+
+    def plot_signal(self, axes, times, values, **kwargs):
+        decimation = Decimation(times, values)
+        line, = axes.plot(*decimation.select(points=type(self).points(axes)), **kwargs)
+        self.lines.append((axes, line, decimation))
+
+        if id(axes) not in self.connected:
+            axes.callbacks.connect('xlim_changed', self.redraw)
+            self.connected.add(id(axes))
+        return line
+
+    def redraw(self, axes):
+        start, stop = axes.get_xlim()
+        for line_axes, line, decimation in self.lines:
+            if line_axes is axes:
+                line.set_data(*decimation.select(start, stop, type(self).points(axes)))
+
+    def plot_r_peaks(self, axes, values):
+        if len(values) == 0:
+            return
+        # one LineCollection for all markers instead of one line per peak
+        axes.vlines(self.ecg.r_peaks.data.times, values.min(), values.max(), colors=type(self).R_PEAK_COLOR)
+
+    def plot(self):
+        for buffer in (self.ecg.raw_data.data, self.ecg.band_pass.data):
+            axes = plt.figure().gca()
+            self.plot_signal(axes, buffer.times, buffer.values)
+            self.plot_r_peaks(axes, buffer.values)
+
+        axes = plt.figure().gca()
+        self.plot_signal(axes, self.ecg.heart_rate.data.times, self.ecg.heart_rate.data.values)
+
+        axes = plt.figure().gca()
+        self.plot_signal(axes, self.ecg.sdrr.data.times, self.ecg.sdrr.data.values, label="sdrr")
+        self.plot_signal(axes, self.ecg.rmssd.data.times, self.ecg.rmssd.data.values, label="rmssd")
+        axes.legend(loc='upper left')
+
+        axes = plt.figure().gca()
+        self.plot_signal(axes, self.ecg.prr50.data.times, self.ecg.prr50.data.values)
+
+        axes = plt.figure().gca()
+        self.plot_signal(axes, self.ecg.hf.data.times, self.ecg.hf.data.values)
+        self.plot_signal(axes, self.ecg.lf.data.times, self.ecg.lf.data.values)
+        ratio = self.ecg.spectrum.lf_hf_ratio
+        self.plot_signal(axes, ratio.times, ratio.values)
+
+    def show(self):
+        self.plot()
+        plt.show()
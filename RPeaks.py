@@ -1,14 +1,14 @@
-from scipy.signal import find_peaks
 import numpy as np
 
 from DataPoint import DataPoint
+from SignalBuffer import SignalBuffer
 
 
 class RPeaks:
     TIME_WINDOW = 5
 
     def __init__(self, data_source, raw_data):
-        self.data = []
+        self.data = SignalBuffer()
         self.data_source = data_source
         self.raw_data = raw_data
 
@@ -18,23 +18,15 @@ class RPeaks:
         else:
             window_start_time = self.data_source.data[-1].time - type(self).TIME_WINDOW
 
-        filtered_data = []
-
-        for data_point in reversed(self.data_source.data):
-            if data_point.time < window_start_time:
-                break
-            filtered_data.append(data_point)
-
-        filtered_data = list(reversed(filtered_data))
-        return filtered_data
+        return self.data_source.data.since(self.data_source.data.search(window_start_time))
 
     def update(self):
         if (len(self.data_source.data) and self.data_source.data[-1].time - self.data_source.data[0].time) < type(self).TIME_WINDOW:
             return
 
-        filtered_data = self.get_time_window()
+        times, values = self.get_time_window()
 
-        new_data = self.find_peaks(filtered_data)
+        new_data = self.find_peaks(times, values)
 
         if len(self.data) > 0:
             max_r_time = self.data[-1].time
@@ -43,26 +35,27 @@ class RPeaks:
 
         new_data = [data for data in new_data if data.time > max_r_time]
 
-        self.data += new_data
+        for data_point in new_data:
+            self.data.append(data_point.time, data_point.value)
 
     def __time_to_index(self, time, data_points):
-        for index, data in enumerate(reversed(data_points)):
-            if data.time == time:
-                return len(data_points) - index
+        index = data_points.search(time)
+        if index < len(data_points) and data_points[index].time == time:
+            return index + 1
 
-    def find_peaks(self, data_points):
-        filtered_values = [data_point.value for data_point in data_points]
-        max_height = max(filtered_values)
+    def find_peaks(self, times, values):
+        from scipy.signal import find_peaks
 
-        x_peaks, _ = find_peaks(filtered_values, prominence=0.1*max_height)
+        max_height = np.max(values)
 
-        times = [data_points[index].time for index in x_peaks]
+        x_peaks, _ = find_peaks(values, prominence=0.1*max_height)
 
         r_data_points = []
-        for time in times:
+        for time in times[x_peaks]:
             index = self.__time_to_index(time, self.raw_data.data)
-            peak = max(self.raw_data.data[index-30:index+30], key=lambda x: x.value)
-            r_data_points.append(peak)
+            raw_times, raw_values = self.raw_data.data.window(index-30, index+30)
+            peak = np.argmax(raw_values)
+            r_data_points.append(DataPoint(time=float(raw_times[peak]), value=float(raw_values[peak])))
 
         return r_data_points
 
@@ -1,20 +1,55 @@
+import re
 import serial
+import threading
+from collections import deque
 
-from DataPoint import DataPoint
+import numpy as np
+
+from DataSource import DataSource
 import time
 
 
-class RawData:
+def crc8_table(polynomial):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ polynomial) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return np.array(table, dtype=np.uint8)
+
+
+class RawData(DataSource):
 
     BAUD_RATE = 115200
     PACKAGE_SIZE = 20
     SPLIT_STRING = "\r\n".encode()
+    # a sample or, while the electrodes are off, the lead-off marker in place of the value
+    LINE_PATTERN = re.compile(rb'\n(\d+)\|\|(\d+|Gagal)\r')
+    LEAD_OFF_VALUE = "Gagal".encode()
     WARMUP_STEPS = 100
 
     MIN_VALUE = 0
     MAX_VALUE = 1000
 
-    def __init__(self, serial_name):
+    MAX_QUEUE_DEPTH = 1000
+
+    PROTOCOLS = ('ascii', 'binary')
+    DETECTION_SIZE = 64
+    SYNC_WORD = (0xA5, 0x5A)
+    FRAME_DTYPE = np.dtype([('sync', '<u2'), ('time', '<u4'), ('value', '<u2'), ('flags', 'u1'), ('crc', 'u1')])
+    CRC8_TABLE = crc8_table(0x07)
+    TIMESTAMP_RANGE = 2**32
+
+    # acquisition state of the running process, left out of checkpoints. The device clock starts over with the
+    # process, so its anchor, wrap count and warmup are not carried over either
+    TRANSIENT = ('serial_device', 'buffer', 'queue', 'data_ready', 'thread', 'running', 'start_time',
+                 'last_timestamp', 'timestamp_wraps', 'warmup_counter')
+
+    def __init__(self, serial_name, capacity=None, spill_path=None, protocol=None):
+        if protocol is not None and protocol not in RawData.PROTOCOLS:
+            raise ValueError("Unknown protocol {}".format(protocol))
+
         try:
             self.serial_device = serial.Serial(serial_name, RawData.BAUD_RATE, timeout=0.5)
         except serial.SerialException as exception:
@@ -26,46 +61,231 @@ class RawData:
         self.serial_device.reset_input_buffer()
         self.serial_device.reset_output_buffer()
 
-        self.buffer = b""
-        self.data = []
+        super().__init__(capacity, spill_path)
+
+        self.buffer = bytearray()
         self.start_time = None
         self.warmup_counter = 0
+        self.protocol = protocol
+        self.last_timestamp = None
+        self.timestamp_wraps = 0
+
+        self.queue = deque()
+        self.data_ready = threading.Event()
+        self.thread = None
+        self.running = False
+
+        self.dropped_bytes = 0
+        self.invalid_lines = 0
+        self.out_of_range = 0
+        self.overruns = 0
+        self.lead_off_samples = 0
+
+    @property
+    def queue_depth(self):
+        return len(self.queue)
 
     def read(self):
-        self.buffer += self.serial_device.read(RawData.PACKAGE_SIZE)
+        self.buffer += self.serial_device.read(max(self.serial_device.in_waiting, RawData.PACKAGE_SIZE))
 
-    def add_data(self, time, value):
-        if self.warmup_counter < RawData.WARMUP_STEPS:
-            self.warmup_counter += 1
-            return
+    def unwrap_times(self, times):
+        if len(times) == 0:
+            return times
+
+        previous = np.empty_like(times)
+        previous[0] = times[0] if self.last_timestamp is None else self.last_timestamp
+        previous[1:] = times[:-1]
+
+        # micros() on the Arduino wraps around after 2**32 us
+        wraps = self.timestamp_wraps + np.cumsum(times < previous)
+
+        self.last_timestamp = int(times[-1])
+        self.timestamp_wraps = int(wraps[-1])
 
-        time = int(time) / 1000000
-        value = int(value)
+        return times + wraps * RawData.TIMESTAMP_RANGE
+
+    def add_data(self, times, values, lead_off=None):
+        times = self.unwrap_times(times)
+        if lead_off is None:
+            lead_off = np.zeros(len(times), dtype=bool)
+
+        skipped = min(RawData.WARMUP_STEPS - self.warmup_counter, len(times))
+        self.warmup_counter += skipped
+        times = times[skipped:] / 1000000
+        values = values[skipped:]
+        lead_off = lead_off[skipped:]
+
+        if len(times) == 0:
+            return
 
         if self.start_time is None:
-            self.start_time = time
+            self.start_time = times[0]
+            if len(self.data) > 1:
+                # a restored session: the device clock has started over, the new samples continue the restored ones
+                last, previous = self.data[-1].time, self.data[-2].time
+                self.start_time -= 2 * last - previous
+
+        times = times - self.start_time
+
+        in_range = (values >= RawData.MIN_VALUE) & (values <= RawData.MAX_VALUE)
+        saturated = ~in_range & ~lead_off
+        self.out_of_range += int(np.count_nonzero(saturated))
+
+        # samples without signal are kept apart from the data, the signal quality flags their segments
+        self.lead_off.extend(times[lead_off], values[lead_off])
+        self.saturated.extend(times[saturated], values[saturated])
+        self.data.extend(times[in_range & ~lead_off], values[in_range & ~lead_off])
+
+    @staticmethod
+    def crc8(frames):
+        crc = np.zeros(len(frames), dtype=np.uint8)
+        for column in range(2, RawData.FRAME_DTYPE.itemsize - 1):
+            crc = RawData.CRC8_TABLE[crc ^ frames[:, column]]
+        return crc
 
-        time = time - self.start_time
+    @staticmethod
+    def find_frames(data):
+        frame_size = RawData.FRAME_DTYPE.itemsize
 
-        if value >= RawData.MIN_VALUE and value <= RawData.MAX_VALUE:
-            self.data.append(DataPoint(time=time, value=value))
+        starts = np.nonzero((data[:-1] == RawData.SYNC_WORD[0]) & (data[1:] == RawData.SYNC_WORD[1]))[0]
+        starts = starts[starts + frame_size <= len(data)]
 
+        frames = data[starts[:, None] + np.arange(frame_size)]
+        valid = RawData.crc8(frames) == frames[:, -1]
+        starts, frames = starts[valid], frames[valid]
+
+        if np.all(np.diff(starts) >= frame_size):
+            return starts, frames
+
+        # a sync word inside the payload of an accepted frame is not a frame start, the rare overlaps are
+        # resolved greedily against the end of the last accepted frame
+        accepted = np.zeros(len(starts), dtype=bool)
+        end = -1
+        for index, start in enumerate(starts.tolist()):
+            if start >= end:
+                accepted[index] = True
+                end = start + frame_size
+
+        return starts[accepted], frames[accepted]
+
+    def detect_protocol(self):
+        if len(self.buffer) < RawData.DETECTION_SIZE:
+            return None
+
+        data = np.frombuffer(bytes(self.buffer[:RawData.DETECTION_SIZE]), dtype=np.uint8)
+        starts, _ = type(self).find_frames(data)
+
+        if len(starts) >= 2:
+            return 'binary'
+        return 'ascii'
 
     def parse(self):
-        split_position = self.buffer.find(RawData.SPLIT_STRING)
+        if self.protocol is None:
+            self.protocol = self.detect_protocol()
 
-        if split_position != -1:
-            try:
-                data_value = self.buffer[:split_position].decode('utf-8')
-                time, value = data_value.split("||")
-                self.add_data(time, value)
-            except ValueError as e:
-                print("Warning: ", e)
-            except UnicodeDecodeError as e:
-                print("Warning: ", e)
+        if self.protocol == 'binary':
+            return self.parse_binary()
+        if self.protocol == 'ascii':
+            return self.parse_ascii()
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
 
-            self.buffer = self.buffer[split_position + len(RawData.SPLIT_STRING):]
+    def parse_binary(self):
+        frame_size = RawData.FRAME_DTYPE.itemsize
+        data = np.frombuffer(bytes(self.buffer), dtype=np.uint8)
+
+        starts, frames = type(self).find_frames(data)
+
+        consumed = max(len(data) - frame_size + 1, 0)
+        if len(starts):
+            consumed = max(consumed, int(starts[-1]) + frame_size)
+
+        self.dropped_bytes += consumed - frame_size * len(starts)
+        del self.buffer[:consumed]
+
+        records = np.frombuffer(frames.tobytes(), dtype=RawData.FRAME_DTYPE)
+
+        lead_off = records['flags'] != 0
+        self.lead_off_samples += int(np.count_nonzero(lead_off))
+
+        return records['time'].astype(np.int64), records['value'].astype(np.int64), lead_off
+
+    def parse_ascii(self):
+        split_position = self.buffer.rfind(RawData.SPLIT_STRING)
+
+        if split_position == -1:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+        # frame every line as \n...\r so a single findall pass picks out all valid ones
+        chunk = b"\n" + self.buffer[:split_position] + b"\r"
+        del self.buffer[:split_position + len(RawData.SPLIT_STRING)]
+
+        matches = RawData.LINE_PATTERN.findall(chunk)
+        lines = chunk.count(RawData.SPLIT_STRING) + 1
+
+        if len(matches) < lines:
+            line_bytes = len(chunk) - 2 - (lines - 1) * len(RawData.SPLIT_STRING)
+            self.invalid_lines += lines - len(matches)
+            self.dropped_bytes += line_bytes - sum(len(t) + len(v) + 2 for t, v in matches)
+
+        if len(matches) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+        samples = np.array(matches)
+        lead_off = samples[:, 1] == RawData.LEAD_OFF_VALUE
+        self.lead_off_samples += int(np.count_nonzero(lead_off))
+
+        values = np.zeros(len(samples), dtype=np.int64)
+        values[~lead_off] = samples[~lead_off, 1].astype(np.int64)
+        return samples[:, 0].astype(np.int64), values, lead_off
+
+    def acquire(self):
+        while self.running:
+            self.read()
+            times, values, lead_off = self.parse()
+
+            if len(times) == 0:
+                continue
+
+            if len(self.queue) >= RawData.MAX_QUEUE_DEPTH:
+                self.queue.popleft()
+                self.overruns += 1
+
+            self.queue.append((times, values, lead_off))
+            self.data_ready.set()
+
+    def wait(self, timeout):
+        if self.thread is None:
+            return
+
+        if not self.queue:
+            self.data_ready.wait(timeout)
+        self.data_ready.clear()
+
+    def start(self):
+        if self.thread is not None:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self.acquire, name="RawData", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+
+        self.running = False
+        self.thread.join()
+        self.thread = None
 
     def update(self):
-        self.read()
-        self.parse()
+        if self.thread is None:
+            self.read()
+            self.add_data(*self.parse())
+            return
+
+        while self.queue:
+            try:
+                batch = self.queue.popleft()
+            except IndexError:
+                return
+            self.add_data(*batch)
@@ -0,0 +1,44 @@
+import json
+import os
+
+import numpy as np
+
+from DataSource import DataSource
+from SignalBuffer import SignalBuffer
+from SessionReader import SessionReader
+from SessionWriter import SessionWriter
+
+
+class RecordedData(DataSource):
+    CSV_EXTENSIONS = ('.csv', '.txt')
+    BINARY_DTYPE = SignalBuffer.SPILL_DTYPE
+
+    def __init__(self, times=(), values=(), start_time=None):
+        super().__init__()
+        self.data.extend(times, values)
+        self.start_time = start_time
+
+    @classmethod
+    def from_file(cls, path):
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension == '.json':
+            with open(path) as infile:
+                model = json.load(infile)
+            samples = np.asarray(model['raw_data'], dtype=float).reshape(-1, 2)
+            return cls(samples[:, 0], samples[:, 1], start_time=model.get('start_time'))
+
+        if extension == SessionWriter.EXTENSION:
+            session = SessionReader(path)
+            return cls(*session.read('raw_data'), start_time=session.start_time)
+
+        if extension in cls.CSV_EXTENSIONS:
+            samples = np.loadtxt(path, delimiter=',', ndmin=2)
+            return cls(samples[:, 0], samples[:, 1])
+
+        # anything else is a raw capture of (time, value) pairs as written by the SignalBuffer spill
+        samples = np.fromfile(path, dtype=cls.BINARY_DTYPE).reshape(-1, 2)
+        return cls(samples[:, 0], samples[:, 1])
+
+    def update(self):
+        pass
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from RecordedData import RecordedData
+from SimulatedData import SimulatedData
+
+
+class ReplayData(SimulatedData):
+    # the replayed recording is passed to the constructor again, only the position in it is saved
+    TRANSIENT = SimulatedData.TRANSIENT + ('times', 'values')
+
+    def __init__(self, recorded_data, speed=None, chunk_size=SimulatedData.CHUNK_SIZE, capacity=None, spill_path=None):
+        self.times, self.values = recorded_data.data.since(0)
+
+        duration = self.times[-1] - self.times[0] if len(self.times) > 1 else 0
+        fs = (len(self.times) - 1) / duration if duration > 0 else 1
+
+        super().__init__(fs, speed, chunk_size, capacity, spill_path)
+        self.start_time = recorded_data.start_time
+
+    @classmethod
+    def from_file(cls, path, speed=None, chunk_size=SimulatedData.CHUNK_SIZE):
+        return cls(RecordedData.from_file(path), speed, chunk_size)
+
+    def pending(self):
+        if self.speed is None or len(self.times) == 0:
+            return super().pending()
+
+        if self.start_clock is None:
+            self.start_clock = time.time()
+            self.start_generated = self.generated
+
+        start = self.times[min(self.start_generated, len(self.times) - 1)]
+        elapsed = (time.time() - self.start_clock) * self.speed
+        return int(np.searchsorted(self.times, start + elapsed, side='right')) - self.generated
+
+    def next_due_time(self):
+        start = self.times[min(self.start_generated, len(self.times) - 1)]
+        index = min(self.generated + self.chunk_size, len(self.times)) - 1
+        return self.start_clock + (self.times[index] - start) / self.speed
+
+    @property
+    def finished(self):
+        return self.generated >= len(self.times)
+
+    def generate(self, count):
+        stop = min(self.generated + count, len(self.times))
+        times = self.times[self.generated:stop]
+        return times, self.values[self.generated:stop], np.zeros(len(times), dtype=bool)
@@ -0,0 +1,87 @@
+import numpy as np
+
+from SignalBuffer import SignalBuffer
+
+
+class Resampling:
+    WINDOW_SIZE = 512
+
+    # an interval longer than this many periods has lost samples
+    GAP_FACTOR = 1.5
+    # gaps up to this many seconds are bridged by interpolation, after longer ones the grid resumes with the signal
+    MAX_GAP = 0.25
+    # weight of every new estimate in the tracked sampling rate of the source
+    TRACKING_WEIGHT = 0.05
+
+    @staticmethod
+    def estimate_frequency(times):
+        # the median interval is unaffected by timestamp jitter and by gaps
+        return 1 / np.median(np.diff(times))
+
+    def __init__(self, data_source, fs=None, capacity=None):
+        self.data = SignalBuffer(capacity)
+        self.gaps = SignalBuffer()
+        self.data_source = data_source
+        self.fs = fs
+
+        # rate of the output grid and tracked rate of the source
+        self.sample_rate = None
+        self.source_rate = None
+
+        # the output grid is origin + index / sample_rate
+        self.origin = None
+        self.next_index = 0
+
+        self.cursor = 0
+        self.dropped_samples = 0
+
+    def initialize(self):
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+        times, _ = self.data_source.data.window(self.cursor, self.cursor + type(self).WINDOW_SIZE)
+
+        self.source_rate = self.fs if self.fs is not None else type(self).estimate_frequency(times)
+        # without a nominal rate the grid runs at the estimate rounded to whole Hz
+        self.sample_rate = self.fs if self.fs is not None else float(np.round(self.source_rate))
+        self.origin = times[0]
+
+    def resample(self, times, values):
+        indices = np.arange(self.next_index, int(np.floor((times[-1] - self.origin) * self.sample_rate)) + 1)
+        if len(indices) == 0:
+            return
+
+        grid = self.origin + indices / self.sample_rate
+        self.data.extend(grid, np.interp(grid, times, values))
+        self.next_index = int(indices[-1]) + 1
+
+    def update(self):
+        if self.sample_rate is None:
+            required = 2 if self.fs is not None else type(self).WINDOW_SIZE
+            if len(self.data_source.data) - max(self.cursor, self.data_source.data.first_index) < required:
+                return
+            self.initialize()
+
+        # the last sample of the previous update is kept to interpolate up to the first new one
+        first = max(self.cursor - 1, self.data_source.data.first_index)
+        times, values = self.data_source.data.since(first)
+
+        if len(times) - (self.cursor - first) <= 0:
+            return
+
+        intervals = np.diff(times)
+        if len(intervals) > 2:
+            estimate = type(self).estimate_frequency(times)
+            self.source_rate += type(self).TRACKING_WEIGHT * (estimate - self.source_rate)
+
+        gaps = np.nonzero(intervals > type(self).GAP_FACTOR / self.source_rate)[0]
+        self.gaps.extend(times[gaps], intervals[gaps])
+        self.dropped_samples += int(np.sum(np.round(intervals[gaps] * self.source_rate) - 1))
+
+        # interpolation runs in one block between the long gaps, usually over everything new at once
+        start = 0
+        for gap in gaps[intervals[gaps] > type(self).MAX_GAP].tolist():
+            self.resample(times[start:gap + 1], values[start:gap + 1])
+            self.next_index = max(self.next_index, int(np.ceil((times[gap + 1] - self.origin) * self.sample_rate)))
+            start = gap + 1
+        self.resample(times[start:], values[start:])
+
+        self.cursor = first + len(times)
@@ -0,0 +1,108 @@
+from collections import deque
+from math import sqrt
+
+from SignalBuffer import SignalBuffer
+
+
+class RunningStatistics:
+    NN50_THRESHOLD = 0.05
+
+    def __init__(self, data_source, window_size=None):
+        self.data_source = data_source
+        self.window_size = window_size
+        self.cursor = 0
+
+        # the values themselves are only kept while they can still be evicted from a window
+        self.window = deque()
+        self.count = 0
+        self.last = None
+
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.squared_differences = 0.0
+        self.nn50 = 0
+
+        self.standard_deviation = SignalBuffer()
+        self.rmssd = SignalBuffer()
+        self.prr50 = SignalBuffer()
+
+    @classmethod
+    def shared(cls, data_source, window_size=None, statistics=None):
+        # the engine behind the SDRR, RMSSD and pNN50 views, built unless one is passed in to be shared
+        if statistics is None:
+            return cls(data_source, window_size)
+        if statistics.window_size != window_size:
+            raise ValueError("Shared statistics use a window of {} intervals, not {}".format(
+                statistics.window_size, window_size))
+        return statistics
+
+    def add(self, value):
+        if self.count:
+            difference = value - self.last
+            self.squared_differences += difference**2
+            if abs(difference) > type(self).NN50_THRESHOLD:
+                self.nn50 += 1
+
+        if self.window_size is not None:
+            self.window.append(value)
+        self.count += 1
+        self.last = value
+
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def evict(self):
+        value = self.window.popleft()
+        self.count -= 1
+
+        if self.count:
+            difference = self.window[0] - value
+            self.squared_differences = max(self.squared_differences - difference**2, 0.0)
+            if abs(difference) > type(self).NN50_THRESHOLD:
+                self.nn50 -= 1
+
+        if self.count == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+            self.squared_differences = 0.0
+            self.last = None
+            return
+
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(self.m2 - delta * (value - self.mean), 0.0)
+
+    def get_standard_deviation(self):
+        if self.count == 0:
+            return 0
+        return sqrt(self.m2 / self.count)
+
+    def get_rmssd(self):
+        if self.count > 1:
+            return sqrt(self.squared_differences / (self.count - 1))
+        return 0
+
+    def get_prr50(self):
+        if self.count > 1:
+            return self.nn50 / (self.count - 1)
+        return 0
+
+    def update(self):
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+        times, values = self.data_source.data.since(self.cursor)
+
+        for time, value in zip(times.tolist(), values.tolist()):
+            self.add(value)
+
+            if self.window_size is not None:
+                if self.count > self.window_size:
+                    self.evict()
+                if self.count < self.window_size:
+                    continue
+
+            self.standard_deviation.append(time, self.get_standard_deviation())
+            self.rmssd.append(time, self.get_rmssd())
+            self.prr50.append(time, self.get_prr50())
+
+        self.cursor += len(times)
@@ -0,0 +1,109 @@
+import time
+import threading
+
+
+class Scheduler:
+    WAIT_TIMEOUT = 0.1
+
+    def __init__(self, ecg, branches=(), threaded=False):
+        self.ecg = ecg
+        self.threaded = threaded
+
+        # length of every input buffer when each stage last ran
+        self.seen = {name: dict.fromkeys(type(ecg).INPUTS[name], 0) for name in type(ecg).STAGES}
+        self.runs = dict.fromkeys(type(ecg).STAGES, 0)
+
+        branch_stages = set(name for branch in branches for name in branch)
+        self.main = [name for name in type(ecg).STAGES if name not in branch_stages]
+        self.branches = [[name for name in type(ecg).STAGES if name in branch] for branch in branches]
+
+        if threaded:
+            # see run_branch, a bounded buffer moves its samples while a branch thread may be reading them
+            for name in set(name for branch in branches for name in branch):
+                for input_name in type(ecg).INPUTS[name]:
+                    data = getattr(ecg, input_name).data
+                    capacity = getattr(data, 'capacity', None)
+                    if input_name not in branch_stages and capacity is not None and data.spill_path is None:
+                        raise ValueError("Threaded branch input {} is bounded to {} samples without a spill file"
+                                         .format(input_name, capacity))
+
+        self.running = False
+        self.threads = []
+        self.wakeups = []
+
+    def is_ready(self, name):
+        inputs = self.seen[name]
+        if not inputs:
+            return True
+        return any(len(getattr(self.ecg, input_name).data) != length for input_name, length in inputs.items())
+
+    def run_stage(self, name):
+        # record the input lengths first, samples arriving while the stage runs trigger another run
+        for input_name in self.seen[name]:
+            self.seen[name][input_name] = len(getattr(self.ecg, input_name).data)
+
+        if self.ecg.instrumentation is not None:
+            self.ecg.instrumentation.run_stage(self.ecg, name)
+        else:
+            getattr(self.ecg, name).update()
+
+        self.runs[name] += 1
+
+    def run_stages(self, names):
+        for name in names:
+            if self.is_ready(name):
+                self.run_stage(name)
+
+    def step(self):
+        self.ecg.raw_data.wait(type(self).WAIT_TIMEOUT)
+
+        step_start = time.perf_counter()
+        self.run_stages(self.main)
+
+        if self.threaded and self.running:
+            for wakeup in self.wakeups:
+                wakeup.set()
+        else:
+            for branch in self.branches:
+                self.run_stages(branch)
+
+        if self.ecg.instrumentation is not None:
+            self.ecg.instrumentation.finish_update(time.perf_counter() - step_start)
+
+    def run_branch(self, branch, wakeup):
+        # branches read buffers of the main chain while it appends to them. A growing buffer is reallocated, but
+        # the samples are copied before the new arrays are published and views taken earlier keep the old ones,
+        # so a branch sees a consistent prefix. Bounded buffers also evict samples, __init__ only accepts them
+        # as branch inputs when a branch that falls behind can read those back from the spill file.
+        while self.running:
+            wakeup.wait(type(self).WAIT_TIMEOUT)
+            wakeup.clear()
+            self.run_stages(branch)
+
+    def start(self):
+        if not self.threaded or self.running:
+            return
+
+        self.running = True
+        for branch in self.branches:
+            wakeup = threading.Event()
+            thread = threading.Thread(target=self.run_branch, args=(branch, wakeup), name="Scheduler", daemon=True)
+            self.wakeups.append(wakeup)
+            self.threads.append(thread)
+            thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+
+        self.running = False
+        for wakeup in self.wakeups:
+            wakeup.set()
+        for thread in self.threads:
+            thread.join()
+
+        self.threads = []
+        self.wakeups = []
+
+        for branch in self.branches:
+            self.run_stages(branch)
@@ -0,0 +1,76 @@
+import json
+import os
+import zlib
+
+import numpy as np
+
+from SessionWriter import SessionWriter
+
+
+class SessionReader:
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, 'rb') as infile:
+            magic = infile.read(len(SessionWriter.MAGIC))
+            if magic != SessionWriter.MAGIC:
+                raise ValueError("{} is not an ECG session file".format(path))
+
+            header_size = int(np.frombuffer(infile.read(SessionWriter.HEADER_SIZE_DTYPE.itemsize),
+                                            dtype=SessionWriter.HEADER_SIZE_DTYPE)[0])
+            header = json.loads(infile.read(header_size).decode())
+
+        self.start_time = header['start_time']
+        self.streams = tuple(header['streams'])
+
+        index_path = path + SessionWriter.INDEX_EXTENSION
+        index = np.fromfile(index_path, dtype=SessionWriter.INDEX_DTYPE) if os.path.exists(index_path) \
+            else np.zeros(0, dtype=SessionWriter.INDEX_DTYPE)
+
+        # a session that was not closed may end in a chunk that never made it to disk
+        self.index = index[index['offset'] + index['size'] <= os.path.getsize(path)]
+
+    @staticmethod
+    def decode(payload, count):
+        planes = np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(-1, count)
+        delta = np.ascontiguousarray(planes.T).view(np.uint64)
+        samples = np.bitwise_xor.accumulate(delta, axis=0).view(np.float64)
+        return samples[:, 0], samples[:, 1]
+
+    def chunks(self, stream):
+        if stream not in self.streams:
+            raise KeyError("Unknown stream {}".format(stream))
+        return self.index[self.index['stream'] == self.streams.index(stream)]
+
+    def count(self, stream):
+        return int(np.sum(self.chunks(stream)['count']))
+
+    def time_range(self, stream):
+        chunks = self.chunks(stream)
+        if len(chunks) == 0:
+            return None
+        return float(chunks['first'][0]), float(chunks['last'][-1])
+
+    def read(self, stream, start=None, stop=None):
+        chunks = self.chunks(stream)
+        if start is not None:
+            chunks = chunks[chunks['last'] >= start]
+        if stop is not None:
+            chunks = chunks[chunks['first'] < stop]
+
+        if len(chunks) == 0:
+            return np.zeros(0), np.zeros(0)
+
+        parts = []
+        with open(self.path, 'rb') as infile:
+            for chunk in chunks:
+                infile.seek(int(chunk['offset']))
+                parts.append(type(self).decode(infile.read(int(chunk['size'])), int(chunk['count'])))
+
+        times = np.concatenate([chunk_times for chunk_times, _ in parts])
+        values = np.concatenate([chunk_values for _, chunk_values in parts])
+
+        low = np.searchsorted(times, start) if start is not None else 0
+        high = np.searchsorted(times, stop) if stop is not None else len(times)
+        return times[low:high], values[low:high]
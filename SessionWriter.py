@@ -0,0 +1,101 @@
+import json
+import time
+import zlib
+
+import numpy as np
+
+
+class SessionWriter:
+    MAGIC = b'ECGSESS1'
+    EXTENSION = '.ecgs'
+    INDEX_EXTENSION = '.index'
+    HEADER_SIZE_DTYPE = np.dtype('<u4')
+
+    # one record per chunk, appended to the index file once the chunk is on disk
+    INDEX_DTYPE = np.dtype([('stream', '<u2'), ('count', '<u4'), ('first', '<f8'), ('last', '<f8'),
+                            ('offset', '<u8'), ('size', '<u4')])
+
+    STREAMS = ('raw_data', 'r_peaks', 'heart_rate', 'rr_intervals', 'sdrr', 'rmssd', 'prr50', 'lf', 'hf',
+               'lf_hf_ratio')
+    FLUSH_INTERVAL = 5
+    COMPRESSION_LEVEL = 6
+
+    def __init__(self, path, ecg, streams=STREAMS, flush_interval=FLUSH_INTERVAL,
+                 compression_level=COMPRESSION_LEVEL):
+        self.path = path
+        self.streams = streams
+        self.buffers = [type(self).stream_buffer(ecg, name) for name in streams]
+        self.cursors = [0] * len(streams)
+        self.flush_interval = flush_interval
+        self.compression_level = compression_level
+
+        self.last_flush = time.time()
+        self.chunks = 0
+        self.bytes_written = 0
+        self.lost_samples = 0
+
+        header = json.dumps({'start_time': ecg.start_time, 'streams': list(streams)}).encode()
+
+        self.file = open(path, 'wb')
+        self.file.write(type(self).MAGIC)
+        self.file.write(np.array(len(header), dtype=type(self).HEADER_SIZE_DTYPE).tobytes())
+        self.file.write(header)
+        self.file.flush()
+        self.index_file = open(path + type(self).INDEX_EXTENSION, 'wb')
+
+    @staticmethod
+    def stream_buffer(ecg, name):
+        if name == 'lf_hf_ratio':
+            return ecg.spectrum.lf_hf_ratio
+        return getattr(ecg, name).data
+
+    @staticmethod
+    def encode(times, values, compression_level=COMPRESSION_LEVEL):
+        bits = np.column_stack((times, values)).astype(np.float64).view(np.uint64)
+
+        # neighbouring samples share their leading bytes, so the xor with the previous one is mostly zero
+        delta = bits.copy()
+        delta[1:] ^= bits[:-1]
+
+        # store every byte position of all samples together so the zero bytes form long runs
+        planes = np.ascontiguousarray(delta.view(np.uint8).reshape(len(delta), -1).T)
+        return zlib.compress(planes.tobytes(), compression_level)
+
+    def write_chunk(self, stream, times, values):
+        payload = type(self).encode(times, values, self.compression_level)
+        offset = self.file.tell()
+
+        self.file.write(payload)
+        self.file.flush()
+
+        record = np.array([(stream, len(times), times[0], times[-1], offset, len(payload))], dtype=type(self).INDEX_DTYPE)
+        self.index_file.write(record.tobytes())
+        self.index_file.flush()
+
+        self.chunks += 1
+        self.bytes_written += len(payload)
+
+    def flush(self):
+        for stream, buffer in enumerate(self.buffers):
+            # samples evicted from a bounded buffer before they were flushed cannot be written any more
+            first = max(self.cursors[stream], buffer.first_index) if buffer.spill_path is None else self.cursors[stream]
+            self.lost_samples += first - self.cursors[stream]
+
+            times, values = buffer.since(first)
+            if len(times):
+                self.write_chunk(stream, times, values)
+            self.cursors[stream] = first + len(times)
+
+        self.last_flush = time.time()
+
+    def update(self):
+        if time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+
+        self.flush()
+        self.file.close()
+        self.index_file.close()
@@ -0,0 +1,190 @@
+import numpy as np
+
+from DataPoint import DataPoint
+
+
+class SignalBuffer:
+    INITIAL_SIZE = 1024
+    SPILL_DTYPE = np.float64
+
+    def __init__(self, capacity=None, spill_path=None):
+        self.capacity = capacity
+        self.spill_path = spill_path
+
+        size = 2 * capacity if capacity is not None else type(self).INITIAL_SIZE
+        self._times = np.empty(size)
+        self._values = np.empty(size)
+
+        # storage positions of the oldest retained sample and one past the newest
+        self._start = 0
+        self._stop = 0
+
+        # absolute index of the oldest retained sample, older ones are evicted
+        self.first_index = 0
+
+        if spill_path is not None:
+            open(spill_path, 'wb').close()
+
+    @classmethod
+    def wrap(cls, times, values):
+        # shares the given arrays without copying, appending moves the samples into own storage first
+        buffer = cls()
+        buffer.reset(times, values)
+        return buffer
+
+    def __len__(self):
+        return self.first_index + self._stop - self._start
+
+    def __iter__(self):
+        for time, value in zip(self.times.tolist(), self.values.tolist()):
+            yield DataPoint(time=time, value=value)
+
+    def __getitem__(self, key):
+        length = len(self)
+
+        if isinstance(key, slice):
+            start, stop, step = key.indices(length)
+            if step != 1:
+                return self[start:stop][::step]
+            times, values = self.window(start, stop)
+            return [DataPoint(time=time, value=value) for time, value in zip(times.tolist(), values.tolist())]
+
+        index = key + length if key < 0 else key
+        if index < 0 or index >= length:
+            raise IndexError("SignalBuffer index out of range")
+
+        if index < self.first_index:
+            times, values = self.window(index, index + 1)
+            return DataPoint(time=float(times[0]), value=float(values[0]))
+
+        position = self._start + index - self.first_index
+        return DataPoint(time=float(self._times[position]), value=float(self._values[position]))
+
+    @property
+    def times(self):
+        return self._times[self._start:self._stop]
+
+    @property
+    def values(self):
+        return self._values[self._start:self._stop]
+
+    def append(self, time, value):
+        self._reserve(1)
+        self._times[self._stop] = time
+        self._values[self._stop] = value
+        self._stop += 1
+
+    def extend(self, times, values):
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        assert len(times) == len(values)
+
+        if len(times) == 0:
+            return
+
+        if self.capacity is not None and len(times) > self.capacity:
+            overflow = len(times) - self.capacity
+            self._evict(self._stop - self._start)
+            self._spill(times[:overflow], values[:overflow])
+            self.first_index += overflow
+            times = times[overflow:]
+            values = values[overflow:]
+
+        self._reserve(len(times))
+        self._times[self._stop:self._stop + len(times)] = times
+        self._values[self._stop:self._stop + len(values)] = values
+        self._stop += len(times)
+
+    def reset(self, times, values, first_index=0):
+        self.first_index = first_index
+
+        if self.capacity is None and len(times):
+            # shares the arrays until the next append
+            self._times = times
+            self._values = values
+            self._start = 0
+            self._stop = len(times)
+            return
+
+        self._start = 0
+        self._stop = 0
+        self.extend(times, values)
+
+    def since(self, index):
+        return self.window(max(index, 0), len(self))
+
+    def window(self, start, stop):
+        start = max(start, 0)
+        stop = min(stop, len(self))
+
+        if start >= stop:
+            return self._times[:0], self._values[:0]
+
+        if start >= self.first_index:
+            offset = self._start - self.first_index
+            return self._times[start + offset:stop + offset], self._values[start + offset:stop + offset]
+
+        if self.spill_path is None:
+            raise IndexError("Samples before index {} have been evicted".format(self.first_index))
+
+        spilled_stop = min(stop, self.first_index)
+        spilled = np.memmap(self.spill_path, dtype=type(self).SPILL_DTYPE, mode='r',
+                            offset=start * 2 * np.dtype(type(self).SPILL_DTYPE).itemsize,
+                            shape=(spilled_stop - start, 2))
+
+        if stop <= self.first_index:
+            return spilled[:, 0], spilled[:, 1]
+
+        times, values = self.window(self.first_index, stop)
+        return np.concatenate((spilled[:, 0], times)), np.concatenate((spilled[:, 1], values))
+
+    def search(self, time, side='left'):
+        return self.first_index + int(np.searchsorted(self.times, time, side=side))
+
+    def tolist(self):
+        return np.column_stack((self.times, self.values)).tolist()
+
+    def _spill(self, times, values):
+        if self.spill_path is None or len(times) == 0:
+            return
+
+        with open(self.spill_path, 'ab') as spill_file:
+            np.column_stack((times, values)).astype(type(self).SPILL_DTYPE).tofile(spill_file)
+
+    def _evict(self, count):
+        if count <= 0:
+            return
+
+        self._spill(self._times[self._start:self._start + count], self._values[self._start:self._start + count])
+        self._start += count
+        self.first_index += count
+
+    def _reserve(self, count):
+        # shared arrays such as a memory-mapped checkpoint may be read-only, they are copied before the first write
+        writeable = self._times.flags.writeable and self._values.flags.writeable
+        if self._stop + count <= len(self._times) and writeable:
+            return
+
+        retained = self._stop - self._start
+
+        if self.capacity is not None:
+            self._evict(min(max(retained + count - self.capacity, 0), retained))
+            retained = self._stop - self._start
+
+        size = len(self._times)
+        while retained + count > size:
+            size *= 2
+
+        if size == len(self._times) and writeable:
+            self._times[:retained] = self._times[self._start:self._stop]
+            self._values[:retained] = self._values[self._start:self._stop]
+        else:
+            times = np.empty(size)
+            values = np.empty(size)
+            times[:retained] = self.times
+            values[:retained] = self.values
+            self._times = times
+            self._values = values
+
+        self._start = 0
+        self._stop = retained
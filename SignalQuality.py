@@ -0,0 +1,112 @@
+import numpy as np
+
+from SignalBuffer import SignalBuffer
+
+
+class SignalQuality:
+    SEGMENT_DURATION = 1.0
+
+    # bit flags of every segment
+    LEAD_OFF = 1
+    SATURATION = 2
+    FLATLINE = 4
+    BASELINE_WANDER = 8
+    NOISE = 16
+    MISSING = 32
+    UNUSABLE = LEAD_OFF | SATURATION | FLATLINE | NOISE | MISSING
+
+    # share of the expected samples below which samples were lost on the way, and the share of samples the device
+    # sent beyond the ADC range that counts as saturation
+    MIN_COVERAGE = 0.8
+    SATURATION_FRACTION = 0.05
+    # peak-to-peak range of a flat segment, change of the baseline between segments and noise level in ADC counts
+    FLATLINE_RANGE = 2
+    WANDER_THRESHOLD = 100
+    NOISE_THRESHOLD = 30
+
+    def __init__(self, data_source, raw_data, segment_duration=SEGMENT_DURATION):
+        self.data = SignalBuffer()
+        self.flags = SignalBuffer()
+        self.data_source = data_source
+        self.raw_data = raw_data
+        self.segment_duration = segment_duration
+
+        self.cursor = 0
+        self.segment_size = None
+        self.last_baseline = None
+
+        # end of the last assessed segment, nothing after it has a quality yet
+        self.covered = -np.inf
+
+    def assess(self, times, segments):
+        starts = times[:, 0]
+        stops = times[:, -1] + 1 / self.data_source.sample_rate
+
+        # lead-off and saturated samples never reach the raw data, the source records their times apart
+        expected = (stops - starts) * self.data_source.sample_rate
+        counts = self.count(self.raw_data.data, starts, stops)
+        lead_off = self.count(self.raw_data.lead_off, starts, stops)
+        saturated = self.count(self.raw_data.saturated, starts, stops)
+        coverage = np.minimum(counts / expected, 1)
+        received = np.minimum((counts + lead_off + saturated) / expected, 1)
+        saturated = np.minimum(saturated / expected, 1)
+        ranges = np.ptp(segments, axis=1)
+
+        baselines = np.median(segments, axis=1)
+        previous = np.concatenate(([baselines[0] if self.last_baseline is None else self.last_baseline], baselines[:-1]))
+        self.last_baseline = baselines[-1]
+
+        # the median absolute second difference estimates white noise and ignores the few QRS samples
+        noise = 1.4826 * np.median(np.abs(np.diff(segments, 2, axis=1)), axis=1) / np.sqrt(6)
+
+        flags = (lead_off > 0) * type(self).LEAD_OFF \
+            + (received < type(self).MIN_COVERAGE) * type(self).MISSING \
+            + (saturated > type(self).SATURATION_FRACTION) * type(self).SATURATION \
+            + (ranges < type(self).FLATLINE_RANGE) * type(self).FLATLINE \
+            + (np.abs(baselines - previous) > type(self).WANDER_THRESHOLD) * type(self).BASELINE_WANDER \
+            + (noise > type(self).NOISE_THRESHOLD) * type(self).NOISE
+
+        index = coverage * (1 - saturated) * np.minimum(type(self).NOISE_THRESHOLD / np.maximum(noise, 1e-12), 1) \
+            * (ranges >= type(self).FLATLINE_RANGE)
+        return starts, stops, index, flags
+
+    @staticmethod
+    def count(buffer, starts, stops):
+        times = buffer.times
+        return np.searchsorted(times, stops) - np.searchsorted(times, starts)
+
+    def usable_at(self, times):
+        flag_times, flags = self.flags.times, self.flags.values
+        segments = np.searchsorted(flag_times, times, side='right') - 1
+
+        usable = np.zeros(len(times), dtype=bool)
+        known = (segments >= 0) & (np.asarray(times) < self.covered)
+        usable[known] = (flags[segments[known]].astype(int) & type(self).UNUSABLE) == 0
+        return usable
+
+    def usable(self, start, stop):
+        first = self.flags.search(start - self.segment_duration, side='right')
+        _, flags = self.flags.window(first, self.flags.search(stop, side='right'))
+        return stop < self.covered and not np.any(flags.astype(int) & type(self).UNUSABLE)
+
+    def update(self):
+        if self.segment_size is None:
+            if getattr(self.data_source, 'sample_rate', None) is None:
+                return
+            self.segment_size = max(int(round(self.segment_duration * self.data_source.sample_rate)), 3)
+
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+        times, values = self.data_source.data.since(self.cursor)
+
+        count = len(times) // self.segment_size
+        if count == 0:
+            return
+
+        # all complete segments are assessed at once, one row each
+        size = count * self.segment_size
+        starts, stops, index, flags = self.assess(times[:size].reshape(count, -1), values[:size].reshape(count, -1))
+
+        self.data.extend(starts, index)
+        self.flags.extend(starts, flags)
+        self.covered = stops[-1]
+        self.cursor += size
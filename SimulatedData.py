@@ -0,0 +1,66 @@
+import time
+from abc import abstractmethod
+
+import numpy as np
+
+from DataSource import DataSource
+
+
+class SimulatedData(DataSource):
+    CHUNK_SIZE = 20
+
+    # the pacing clock belongs to the running process and is left out of checkpoints
+    TRANSIENT = ('start_clock', 'start_generated')
+
+    def __init__(self, fs, speed=None, chunk_size=CHUNK_SIZE, capacity=None, spill_path=None):
+        super().__init__(capacity, spill_path)
+        self.fs = fs
+        self.speed = speed
+        self.chunk_size = chunk_size
+        self.start_clock = None
+        # samples generated when the clock was started, a restored source continues from there
+        self.start_generated = 0
+        self.generated = 0
+        self.lead_off_samples = 0
+
+    @property
+    def finished(self):
+        return False
+
+    @abstractmethod
+    def generate(self, count):
+        pass
+
+    def pending(self):
+        if self.speed is None:
+            return self.chunk_size
+
+        if self.start_clock is None:
+            self.start_clock = time.time()
+            self.start_generated = self.generated
+
+        return int((time.time() - self.start_clock) * self.speed * self.fs) - (self.generated - self.start_generated)
+
+    def next_due_time(self):
+        return self.start_clock + (self.generated - self.start_generated + self.chunk_size) / (self.speed * self.fs)
+
+    def wait(self, timeout):
+        if self.speed is None or self.start_clock is None:
+            return
+        time.sleep(min(max(self.next_due_time() - time.time(), 0), timeout))
+
+    def next_samples(self):
+        count = self.pending()
+        if count <= 0 or self.finished:
+            return np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool)
+
+        times, values, lead_off = self.generate(count)
+        self.generated += len(times)
+        return times, values, lead_off
+
+    def update(self):
+        times, values, lead_off = self.next_samples()
+
+        self.lead_off_samples += int(np.count_nonzero(lead_off))
+        self.lead_off.extend(times[lead_off], values[lead_off])
+        self.data.extend(times[~lead_off], values[~lead_off])
@@ -0,0 +1,101 @@
+import numpy as np
+
+from SignalBuffer import SignalBuffer
+
+
+class SpectralAnalysis:
+    LF_BAND = (0.04, 0.15)
+    HF_BAND = (0.15, 0.4)
+
+    # short-term HRV is conventionally evaluated over five minutes
+    TIME_WINDOW = 300
+
+    METHODS = ('periodogram', 'welch', 'lombscargle')
+    WELCH_SEGMENT_SIZE = 256
+    LOMBSCARGLE_OVERSAMPLING = 4
+
+    def __init__(self, data_source, window_size=None, time_window=None, stride=1, method='periodogram',
+                 fs=1/0.25, lf_band=LF_BAND, hf_band=HF_BAND):
+        if method not in type(self).METHODS:
+            raise ValueError("Unknown spectral method {}".format(method))
+
+        self.data_source = data_source
+        self.window_size = window_size
+        self.time_window = time_window
+        self.stride = stride
+        self.method = method
+        self.fs = fs
+        self.lf_band = lf_band
+        self.hf_band = hf_band
+        self.cursor = 0
+
+        self.lf = SignalBuffer()
+        self.hf = SignalBuffer()
+        self.lf_hf_ratio = SignalBuffer()
+
+    def interpolate(self, times, values):
+        step = 1 / self.fs
+        grid = step * np.arange(int(times[0] / step) + 1, int(times[-1] / step))
+        return np.interp(grid, times, values)
+
+    @staticmethod
+    def band_power(freqs, density, band):
+        indices = np.nonzero((freqs >= band[0]) & (freqs <= band[1]))[0]
+        indices = indices[indices > 0]
+        return float(np.sum(density[indices] * (freqs[indices] - freqs[indices - 1])))
+
+    def spectrum(self, times, values):
+        # the spectral stack is only loaded once there are enough intervals for a first spectrum
+        from scipy.signal import lombscargle, periodogram, welch
+
+        if self.method == 'lombscargle':
+            if len(values) < 2:
+                return np.zeros(0), np.zeros(0)
+            step = 1 / ((times[-1] - times[0]) * type(self).LOMBSCARGLE_OVERSAMPLING)
+            freqs = step * np.arange(1, int(self.hf_band[1] / step) + 2)
+            power = lombscargle(times, values - np.mean(values), 2 * np.pi * freqs)
+            # scale the unnormalized periodogram to a one-sided density like periodogram()
+            return freqs, 2 * power * (times[-1] - times[0]) / len(values)
+
+        resampled = self.interpolate(times, values)
+        if len(resampled) == 0:
+            return np.zeros(0), np.zeros(0)
+
+        if self.method == 'welch':
+            return welch(resampled, self.fs, nperseg=min(len(resampled), type(self).WELCH_SEGMENT_SIZE))
+        return periodogram(resampled, self.fs)
+
+    def get_window_start(self, index, time):
+        start = self.data_source.data.first_index
+        if self.window_size is not None:
+            start = max(start, index - self.window_size + 1)
+        if self.time_window is not None:
+            start = max(start, self.data_source.data.search(time - self.time_window))
+        return start
+
+    def update(self):
+        stop = len(self.data_source.data)
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+
+        for index in range(self.cursor, stop):
+            if self.window_size is not None and index < self.window_size - 1:
+                continue
+            if (index + 1) % self.stride != 0:
+                continue
+
+            time = self.data_source.data[index].time
+            times, values = self.data_source.data.window(self.get_window_start(index, time), index + 1)
+
+            try:
+                freqs, density = self.spectrum(times, values)
+            except ValueError:
+                continue
+
+            lf = type(self).band_power(freqs, density, self.lf_band)
+            hf = type(self).band_power(freqs, density, self.hf_band)
+
+            self.lf.append(time, lf)
+            self.hf.append(time, hf)
+            self.lf_hf_ratio.append(time, lf / hf if hf > 0 else 0)
+
+        self.cursor = stop
@@ -1,15 +1,18 @@
-from DataPoint import DataPoint
+from SignalBuffer import SignalBuffer
 
 
 class Squaring:
-    def __init__(self, data_source):
-        self.data = []
+    def __init__(self, data_source, capacity=None):
+        self.data = SignalBuffer(capacity)
         self.data_source = data_source
+        self.cursor = 0
 
     def update(self):
-        if len(self.data_source.data) == 0:
-            return
+        self.cursor = max(self.cursor, self.data_source.data.first_index)
+        times, values = self.data_source.data.since(self.cursor)
 
-        filtered_data = self.data_source.data[len(self.data):]
+        if len(times) == 0:
+            return
 
-        self.data.extend([DataPoint(time=dataPoint.time, value=dataPoint.value**2) for dataPoint in filtered_data])
+        self.data.extend(times, values**2)
+        self.cursor += len(times)
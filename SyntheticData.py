@@ -0,0 +1,89 @@
+import numpy as np
+
+from SignalBuffer import SignalBuffer
+from SimulatedData import SimulatedData
+
+
+class SyntheticData(SimulatedData):
+    BASELINE = 500
+    MAX_VALUE = 1023
+
+    BASELINE_WANDER_AMPLITUDE = 30
+    BASELINE_WANDER_FREQUENCY = 0.3
+
+    # (delay after the R peak in s, width in s, amplitude) of the P, Q, R, S and T waves
+    WAVES = (
+        (-0.2, 0.025, 25),
+        (-0.03, 0.01, -40),
+        (0.0, 0.012, 300),
+        (0.03, 0.01, -60),
+        (0.25, 0.05, 50)
+    )
+    BEAT_EXTENT = (-0.3, 0.45)
+
+    # respiratory (HF) and Mayer wave (LF) modulation of the RR intervals
+    RSA_FREQUENCY = 0.25
+    MAYER_FREQUENCY = 0.1
+
+    def __init__(self, fs=200, heart_rate=70, hrv=0.05, noise=3, lead_off_rate=0, lead_off_duration=1.0,
+                 speed=None, chunk_size=SimulatedData.CHUNK_SIZE, seed=None, capacity=None, spill_path=None):
+        super().__init__(fs, speed, chunk_size, capacity, spill_path)
+
+        self.heart_rate = heart_rate
+        self.hrv = hrv
+        self.noise = noise
+        self.lead_off_rate = lead_off_rate
+        self.lead_off_duration = lead_off_duration
+        self.random = np.random.RandomState(seed)
+
+        # ground truth: beat times with the preceding RR interval, lead-off periods
+        self.beats = SignalBuffer()
+        self.next_beat = 0.5
+        self.lead_off_periods = []
+        self.next_lead_off = self.draw_lead_off_delay()
+
+    def draw_lead_off_delay(self):
+        if self.lead_off_rate <= 0:
+            return np.inf
+        return self.random.exponential(1 / self.lead_off_rate)
+
+    def extend_beats(self, until):
+        while self.next_beat <= until:
+            mean_rr = 60 / self.heart_rate
+            rr = mean_rr * (1 + self.hrv * (np.sin(2 * np.pi * type(self).RSA_FREQUENCY * self.next_beat)
+                                           + 0.7 * np.sin(2 * np.pi * type(self).MAYER_FREQUENCY * self.next_beat)
+                                           + 0.3 * self.random.randn()))
+            self.beats.append(self.next_beat, rr)
+            self.next_beat += rr
+
+    def extend_lead_off(self, until):
+        while self.next_lead_off <= until:
+            self.lead_off_periods.append((self.next_lead_off, self.next_lead_off + self.lead_off_duration))
+            self.next_lead_off += self.lead_off_duration + self.draw_lead_off_delay()
+
+    def generate(self, count):
+        times = (self.generated + np.arange(count)) / self.fs
+        start, stop = times[0], times[-1]
+
+        self.extend_beats(stop - type(self).BEAT_EXTENT[0])
+        self.extend_lead_off(stop)
+
+        values = type(self).BASELINE \
+            + type(self).BASELINE_WANDER_AMPLITUDE * np.sin(2 * np.pi * type(self).BASELINE_WANDER_FREQUENCY * times) \
+            + self.noise * self.random.randn(count)
+
+        first_beat = self.beats.search(start - type(self).BEAT_EXTENT[1])
+        beat_times, _ = self.beats.since(first_beat)
+        for beat_time in beat_times:
+            low, high = np.searchsorted(times, beat_time + np.array(type(self).BEAT_EXTENT))
+            for delay, width, amplitude in type(self).WAVES:
+                values[low:high] += amplitude * np.exp(-((times[low:high] - beat_time - delay) / width)**2)
+
+        lead_off = np.zeros(count, dtype=bool)
+        for lead_off_start, lead_off_stop in reversed(self.lead_off_periods):
+            if lead_off_stop < start:
+                break
+            lead_off |= (times >= lead_off_start) & (times < lead_off_stop)
+
+        values = np.clip(np.round(values), 0, type(self).MAX_VALUE)
+        return times, values, lead_off
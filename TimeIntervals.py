@@ -1,33 +1,81 @@
-from DataPoint import DataPoint
+from collections import deque
+
+import numpy as np
+
+from SignalBuffer import SignalBuffer
+
 
 class TimeIntervals:
+    NORMAL = 0
+    OUT_OF_RANGE = 1
+    ECTOPIC = 2
+    UNUSABLE = 3
+
+    # physiologically plausible RR intervals, 200 to 30 beats per minute
+    MIN_INTERVAL = 0.3
+    MAX_INTERVAL = 2.0
 
-    def __init__(self, data_source):
+    # an interval further than this fraction from the median of the recent ones is taken as ectopic
+    ECTOPIC_THRESHOLD = 0.2
+    REFERENCE_SIZE = 5
+
+    def __init__(self, data_source, quality=None):
         self.data_source = data_source
-        self.data = []
+        self.quality = quality
+        self.data = SignalBuffer()
+
+        # one flag per interval in data, and the normal-to-normal intervals alone
+        self.flags = SignalBuffer()
+        self.normal = SignalBuffer()
+
+        # index of the R peak that ends the next interval
+        self.cursor = 1
+        self.reference = deque(maxlen=type(self).REFERENCE_SIZE)
+
+    def classify(self, interval):
+        if interval < type(self).MIN_INTERVAL or interval > type(self).MAX_INTERVAL:
+            return type(self).OUT_OF_RANGE
 
-    def get_new_data(self):
-        if len(self.data) == 0:
-            return self.data_source.data
-        else:
-            current_time = self.data[-1].time
+        ectopic = len(self.reference) and \
+            abs(interval - np.median(self.reference)) > type(self).ECTOPIC_THRESHOLD * np.median(self.reference)
 
-        new_data_points = []
-        for dp in reversed(self.data_source.data):
-            if dp.time >= current_time:
-                new_data_points.append(dp)
-            else:
-                break
+        # ectopic intervals still enter the reference, so a real change of the heart rate is followed
+        self.reference.append(interval)
+        return type(self).ECTOPIC if ectopic else type(self).NORMAL
 
-        return list(reversed(new_data_points))
+    def window(self, beats=None, seconds=None, until=None, normal=False):
+        # the last beats intervals and/or seconds before until, looked up in the interval times
+        buffer = self.normal if normal else self.data
+        stop = len(buffer) if until is None else buffer.search(until, side='right')
+        start = buffer.first_index
+
+        if beats is not None:
+            start = max(start, stop - beats)
+        if seconds is not None and stop > start:
+            last_time = buffer.window(stop - 1, stop)[0][0]
+            start = max(start, buffer.search(last_time - seconds, side='right'))
+
+        return buffer.window(start, stop)
 
     def update(self):
-        new_data = self.get_new_data()
-
-        for i in range(len(new_data)-1):
-            self.data.append(
-                DataPoint(
-                    time=new_data[i+1].time,
-                    value=new_data[i+1].time - new_data[i].time
-                )
-            )
+        times, _ = self.data_source.data.since(max(self.cursor - 1, self.data_source.data.first_index))
+
+        if len(times) < 2:
+            return
+
+        intervals = np.diff(times)
+
+        usable = [True] * len(intervals)
+        if self.quality is not None:
+            # an interval over a segment of bad signal may have lost beats, it stays out of the reference as well
+            usable = [self.quality.usable(start, stop) for start, stop in zip(times[:-1].tolist(), times[1:].tolist())]
+
+        flags = np.array([self.classify(interval) if ok else type(self).UNUSABLE
+                          for interval, ok in zip(intervals.tolist(), usable)])
+
+        self.data.extend(times[1:], intervals)
+        self.flags.extend(times[1:], flags)
+        normal = flags == type(self).NORMAL
+        self.normal.extend(times[1:][normal], intervals[normal])
+
+        self.cursor += len(intervals)
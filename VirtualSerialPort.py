@@ -0,0 +1,95 @@
+import os
+import tty
+import select
+import time
+import threading
+
+import numpy as np
+
+from RawData import RawData
+
+
+class VirtualSerialPort:
+    IDLE_SLEEP = 0.001
+    WRITE_TIMEOUT = 0.1
+
+    def __init__(self, source, protocol='ascii'):
+        if protocol not in RawData.PROTOCOLS:
+            raise ValueError("Unknown protocol {}".format(protocol))
+
+        self.source = source
+        self.protocol = protocol
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port_name = os.ttyname(self.slave)
+
+        self.thread = None
+        self.running = False
+        self.written_bytes = 0
+
+    @staticmethod
+    def encode_ascii(timestamps, values, lead_off):
+        lines = [
+            "{}||Gagal\r\n".format(timestamp) if off else "{}||{}\r\n".format(timestamp, value)
+            for timestamp, value, off in zip(timestamps.tolist(), values.tolist(), lead_off.tolist())
+        ]
+        return "".join(lines).encode()
+
+    @staticmethod
+    def encode_binary(timestamps, values, lead_off):
+        records = np.zeros(len(timestamps), dtype=RawData.FRAME_DTYPE)
+        records['sync'] = RawData.SYNC_WORD[0] | RawData.SYNC_WORD[1] << 8
+        records['time'] = timestamps
+        records['value'] = np.where(lead_off, 0, values)
+        records['flags'] = np.where(lead_off, 0x03, 0)
+
+        frames = records.view(np.uint8).reshape(len(records), RawData.FRAME_DTYPE.itemsize)
+        records['crc'] = RawData.crc8(frames)
+        return records.tobytes()
+
+    def encode(self, times, values, lead_off):
+        timestamps = (np.round(times * 1000000).astype(np.int64) % RawData.TIMESTAMP_RANGE)
+        values = values.astype(np.int64)
+
+        if self.protocol == 'binary':
+            return type(self).encode_binary(timestamps, values, lead_off)
+        return type(self).encode_ascii(timestamps, values, lead_off)
+
+    def transmit(self):
+        while self.running and not self.source.finished:
+            times, values, lead_off = self.source.next_samples()
+
+            if len(times) == 0:
+                time.sleep(type(self).IDLE_SLEEP)
+                continue
+
+            payload = self.encode(times, values, lead_off)
+            while payload and self.running:
+                _, writable, _ = select.select([], [self.master], [], type(self).WRITE_TIMEOUT)
+                if not writable:
+                    continue
+                written = os.write(self.master, payload)
+                payload = payload[written:]
+                self.written_bytes += written
+
+    def start(self):
+        if self.thread is not None:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self.transmit, name="VirtualSerialPort", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+
+        self.running = False
+        self.thread.join()
+        self.thread = None
+
+    def close(self):
+        self.stop()
+        os.close(self.master)
+        os.close(self.slave)
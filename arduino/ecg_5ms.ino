@@ -1,3 +1,19 @@
+// Set to 1 to send framed binary samples instead of ASCII "micros||value" lines.
+// Binary frames are 10 bytes, which leaves room for 1 kHz sampling at 115200 baud.
+#define BINARY_PROTOCOL 0
+
+#if BINARY_PROTOCOL
+#define SAMPLE_INTERVAL_US 1000
+#else
+#define SAMPLE_INTERVAL_US 5000
+#endif
+
+// frame: sync (0xA5 0x5A), uint32 micros, uint16 value, uint8 lead-off flags, uint8 CRC-8
+// all little-endian, CRC-8 (polynomial 0x07) over micros, value and flags
+#define SYNC_0 0xA5
+#define SYNC_1 0x5A
+#define FRAME_SIZE 10
+
 void setup() {
   pinMode(10,INPUT);
   pinMode(11,INPUT);
@@ -6,23 +22,56 @@ void setup() {
 }
 
 unsigned long micros_pre = 0;
-unsigned long micros_interval = 5000;
+unsigned long micros_interval = SAMPLE_INTERVAL_US;
+
+uint8_t crc8(const uint8_t *data, uint8_t length) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < length; i++) {
+    crc ^= data[i];
+    for (uint8_t bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void send_frame(unsigned long timestamp, uint16_t value, uint8_t flags) {
+  uint8_t frame[FRAME_SIZE];
+
+  frame[0] = SYNC_0;
+  frame[1] = SYNC_1;
+  frame[2] = timestamp & 0xFF;
+  frame[3] = (timestamp >> 8) & 0xFF;
+  frame[4] = (timestamp >> 16) & 0xFF;
+  frame[5] = (timestamp >> 24) & 0xFF;
+  frame[6] = value & 0xFF;
+  frame[7] = (value >> 8) & 0xFF;
+  frame[8] = flags;
+  frame[9] = crc8(frame + 2, FRAME_SIZE - 3);
+
+  Serial.write(frame, FRAME_SIZE);
+}
 
 void loop() {
   micros_pre = micros();
-  
+
+  uint8_t flags = (digitalRead(10) == 1 ? 0x01 : 0) | (digitalRead(11) == 1 ? 0x02 : 0);
+
+#if BINARY_PROTOCOL
+  send_frame(micros_pre, flags ? 0 : analogRead(A1), flags);
+#else
   Serial.print(micros_pre);
   Serial.print("||");
   
-  if((digitalRead(10)==1)||(digitalRead(11)==1)){
+  if(flags){
       Serial.println("Gagal");
   }
   else{
       Serial.println(analogRead(A1));
   }
+#endif
   
   while(micros() < micros_pre + micros_interval) {
      //waiting 
   }
 }
-
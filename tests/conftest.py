@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Ecg import ECG
+from RecordedData import RecordedData
+from SyntheticData import SyntheticData
+
+
+def feed_chunks(source, times, values, *updates, chunk_size=20):
+    start = 0
+    while start < len(times):
+        stop = start + (chunk_size() if callable(chunk_size) else chunk_size)
+        source.data.extend(times[start:stop], values[start:stop])
+        for update in updates:
+            update()
+        start = stop
+
+
+@pytest.fixture
+def synthetic():
+    # (times, values, source) of a synthetic ECG with known beats, generated ahead of the test
+    def generate(duration, fs=200, seed=0, **options):
+        source = SyntheticData(fs=fs, seed=seed, chunk_size=int(duration * fs), **options)
+        source.update()
+        return source.data.times.copy(), source.data.values.copy(), source
+    return generate
+
+
+@pytest.fixture
+def feed():
+    # appends samples to a source in chunks like a live device and runs the updates after every chunk. The chunk
+    # size is a number of samples or a function drawing the size of the next chunk
+    return feed_chunks
+
+
+@pytest.fixture
+def stream():
+    # a full ECG pipeline fed in chunks
+    def run(times, values, chunk_size=20):
+        source = RecordedData()
+        ecg = ECG(raw_data=source)
+        feed_chunks(source, times, values, ecg.update, chunk_size=chunk_size)
+        return ecg
+    return run
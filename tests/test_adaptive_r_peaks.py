@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from AdaptiveRPeaks import AdaptiveRPeaks
+from RecordedData import RecordedData
+from SignalBuffer import SignalBuffer
+
+
+def matched(detected, truth, tolerance=0.05):
+    return sum(np.min(np.abs(detected - beat)) < tolerance for beat in truth)
+
+
+def test_finds_synthetic_beats_at_several_heart_rates(synthetic, stream):
+    for heart_rate in (45, 70, 140):
+        times, values, source = synthetic(60, heart_rate=heart_rate)
+        detected = stream(times, values, 20).r_peaks.data.times
+
+        truth = source.beats.times[(source.beats.times > 3) & (source.beats.times < times[-1] - 1)]
+        assert matched(detected, truth) == len(truth)
+        assert matched(truth, detected[(detected > 3) & (detected < times[-1] - 1)]) == len(truth)
+
+
+def test_peaks_do_not_depend_on_chunk_size(synthetic, stream):
+    times, values, _ = synthetic(60)
+    expected = stream(times, values, 20).r_peaks.data.times
+
+    for chunk_size in (1, 7, 333, len(times)):
+        assert np.array_equal(stream(times, values, chunk_size).r_peaks.data.times, expected)
+
+
+def test_peaks_are_located_in_the_band_pass_signal(synthetic, stream):
+    times, values, _ = synthetic(30)
+    ecg = stream(times, values, 20)
+
+    assert ecg.r_peaks.band_pass is ecg.band_pass
+    assert np.all(np.isin(ecg.r_peaks.data.times, ecg.band_pass.data.times))
+    assert np.all(np.isin(ecg.r_peaks.data.values, ecg.band_pass.data.values))
+
+
+def test_learning_works_on_bounded_buffers():
+    integrated = SimpleNamespace(data=SignalBuffer(capacity=500))
+    times = np.arange(2000) / 200.0
+    integrated.data.extend(times, 1 + (np.arange(2000) % 200 == 0))
+
+    # the first samples are evicted before the detector has seen enough signal to learn its levels
+    detector = AdaptiveRPeaks(integrated, RecordedData())
+    assert integrated.data.first_index > 0
+    assert detector.learn()
+    assert np.isclose(detector.signal_level, 2 / 3)
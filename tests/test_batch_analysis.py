@@ -0,0 +1,57 @@
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+from BatchAnalysis import BatchAnalysis
+from RecordedData import RecordedData
+from SessionWriter import SessionWriter
+
+
+def test_batch_matches_streaming(synthetic, stream):
+    times, values, source = synthetic(120)
+    analysis = BatchAnalysis(RecordedData(times, values))
+    summary = analysis.run()
+    ecg = stream(times, values)
+
+    assert np.array_equal(analysis.ecg.r_peaks.data.times, ecg.r_peaks.data.times)
+    assert np.allclose(analysis.ecg.sdrr.data.values, ecg.sdrr.data.values)
+    assert summary['r_peaks'] == len(ecg.r_peaks.data)
+    assert abs(summary['r_peaks'] - len(source.beats)) <= 3
+
+
+def test_start_time_comes_from_the_recording(synthetic, tmp_path):
+    times, values, _ = synthetic(20)
+
+    assert BatchAnalysis(RecordedData(times, values)).run()['start_time'] is None
+
+    path = str(tmp_path / 'session.json')
+    with open(path, 'w') as outfile:
+        json.dump({'start_time': 1000.0, 'raw_data': np.column_stack((times, values)).tolist()}, outfile)
+    assert BatchAnalysis.from_file(path).run()['start_time'] == 1000.0
+
+    path = str(tmp_path / ('session' + SessionWriter.EXTENSION))
+    session = SessionWriter(path, SimpleNamespace(start_time=2000.0, raw_data=RecordedData(times, values)),
+                            streams=('raw_data',))
+    session.update()
+    session.close()
+    assert BatchAnalysis.from_file(path).run()['start_time'] == 2000.0
+
+    # a copied or touched file has no bearing on when the recording started
+    path = str(tmp_path / 'capture.csv')
+    np.savetxt(path, np.column_stack((times, values)), delimiter=',')
+    os.utime(path, (5000.0, 5000.0))
+    assert BatchAnalysis.from_file(path).run()['start_time'] is None
+
+
+def test_raw_captures_are_mapped(synthetic, tmp_path):
+    times, values, _ = synthetic(30)
+    path = str(tmp_path / 'capture.raw')
+    np.column_stack((times, values)).astype(RecordedData.BINARY_DTYPE).tofile(path)
+
+    analysis = BatchAnalysis.from_file(path)
+    analysis.run()
+    reference = BatchAnalysis(RecordedData(times, values))
+    reference.run()
+    assert np.array_equal(analysis.ecg.r_peaks.data.times, reference.ecg.r_peaks.data.times)
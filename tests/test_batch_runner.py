@@ -0,0 +1,64 @@
+import csv
+import os
+
+import numpy as np
+
+from BatchRunner import BatchRunner
+
+
+def write_recordings(directory, synthetic, count=2):
+    os.makedirs(os.path.join(directory, 'day'), exist_ok=True)
+    for index in range(count):
+        times, values, _ = synthetic(15, seed=index)
+        np.savetxt(os.path.join(directory, 'day', 'patient{}.csv'.format(index)),
+                   np.column_stack((times, values)), delimiter=',')
+
+
+def test_runs_every_recording_and_resumes(synthetic, tmp_path):
+    input_directory = str(tmp_path / 'input')
+    output_directory = str(tmp_path / 'output')
+    write_recordings(input_directory, synthetic)
+
+    runner = BatchRunner(input_directory, output_directory, workers=2)
+    runner.run()
+    assert not runner.failures
+
+    with open(os.path.join(output_directory, BatchRunner.SUMMARY_NAME)) as summary_file:
+        rows = list(csv.DictReader(summary_file))
+    assert sorted(row['recording'] for row in rows) == [os.path.join('day', 'patient0.csv'),
+                                                        os.path.join('day', 'patient1.csv')]
+    assert all(int(row['r_peaks']) > 10 for row in rows)
+
+    assert len(runner.load_manifest()) == 2
+    resumed = BatchRunner(input_directory, output_directory, workers=1)
+    assert set(resumed.find_recordings()) == resumed.load_manifest()
+
+
+def test_output_inside_input_is_not_scanned(synthetic, tmp_path):
+    input_directory = str(tmp_path)
+    output_directory = str(tmp_path / 'results')
+    write_recordings(input_directory, synthetic)
+
+    runner = BatchRunner(input_directory, output_directory, workers=1)
+    runner.run()
+    runner.run()
+
+    assert runner.find_recordings() == [os.path.join('day', 'patient0.csv'), os.path.join('day', 'patient1.csv')]
+    assert not runner.failures
+
+    same = BatchRunner(input_directory, input_directory, workers=1)
+    same.run()
+    assert BatchRunner.SUMMARY_NAME not in same.find_recordings()
+    assert BatchRunner.MANIFEST_NAME not in same.find_recordings()
+
+
+def test_every_format_read_by_recorded_data_is_found(synthetic, tmp_path):
+    times, values, _ = synthetic(15)
+    for name in ('capture.txt', 'capture.CSV'):
+        np.savetxt(str(tmp_path / name), np.column_stack((times, values)), delimiter=',')
+    (tmp_path / 'notes.md').write_text('not a recording')
+
+    runner = BatchRunner(str(tmp_path), str(tmp_path / 'results'), workers=1)
+    assert runner.find_recordings() == ['capture.CSV', 'capture.txt']
+    runner.run()
+    assert not runner.failures
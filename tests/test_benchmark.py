@@ -0,0 +1,54 @@
+import numpy as np
+
+from Benchmark import Benchmark, LatencyRecorder
+from Ecg import ECG
+from HeartRate import HeartRate
+
+
+def test_latency_recorder_percentiles_and_growth():
+    recorder = LatencyRecorder()
+    for segment in range(LatencyRecorder.SEGMENTS):
+        for latency in np.linspace(1e-4, 2e-4, 100):
+            recorder.record(latency * (segment + 1), segment)
+
+    summary = recorder.summary()
+    assert summary['updates'] == 100 * LatencyRecorder.SEGMENTS
+    assert summary['p50'] <= summary['p90'] <= summary['p99'] <= summary['max'] * 1.03
+    assert np.isclose(summary['growth'], 10 / 2, rtol=0.01)
+
+
+def test_run_duration_reports_every_stage():
+    result = Benchmark(durations=(10,)).run_duration(10)
+
+    assert result['samples'] >= 10 * Benchmark.FS
+    assert result['r_peaks'] > 5
+    assert set(result['stages']) == set(ECG.STAGES)
+
+
+def test_run_duration_leaves_pipeline_output_alone(monkeypatch, capsys):
+    update = HeartRate.update
+
+    def noisy_update(self):
+        print('heart rate update')
+        update(self)
+    monkeypatch.setattr(HeartRate, 'update', noisy_update)
+
+    Benchmark(durations=(5,)).run_duration(5)
+    assert 'heart rate update' in capsys.readouterr().out
+
+
+def test_growth_is_flagged_for_slow_stages_only():
+    benchmark = Benchmark()
+    result = {'stages': {
+        'grows': {'growth': 5.0, 'mean': 1e-3},
+        'cheap': {'growth': 5.0, 'mean': 1e-7},
+        'flat': {'growth': 1.0, 'mean': 1e-3}
+    }}
+
+    assert benchmark.flag_growth(result) == ['grows']
+
+
+def test_importing_the_pipeline_leaves_out_scipy_and_matplotlib():
+    result = Benchmark().measure_import('Ecg')
+    assert result['module'] == 'Ecg'
+    assert result['loaded'] == []
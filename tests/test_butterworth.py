@@ -0,0 +1,30 @@
+import numpy as np
+from scipy.signal import sosfilt, sosfilt_zi
+
+from Butterworth import Butterworth
+from RecordedData import RecordedData
+
+
+def test_streaming_matches_one_pass_filter(feed):
+    rng = np.random.RandomState(0)
+    times = np.arange(3000) / 200.0
+    values = 500 + 50 * np.sin(2 * np.pi * 1.2 * times) + rng.randn(len(times))
+
+    source = RecordedData()
+    stage = Butterworth(source, 0.5, 20, streaming=True, fs=200)
+    feed(source, times, values, stage.update, chunk_size=lambda: rng.randint(1, 60))
+
+    sos = Butterworth.butter_bandpass_sos(200, 0.5, 20, 2, 1)
+    expected, _ = sosfilt(sos, values, zi=sosfilt_zi(sos) * values[0])
+    assert np.array_equal(stage.data.times, times)
+    assert np.allclose(stage.data.values, expected)
+
+
+def test_streaming_estimates_frequency_without_fs():
+    times = np.arange(1000) / 250.0
+    source = RecordedData(times, np.sin(times))
+    stage = Butterworth(source, 0.5, 20, streaming=True)
+    stage.update()
+
+    assert abs(stage.frequency - 250) < 1
+    assert len(stage.data) == len(times)
@@ -0,0 +1,112 @@
+import os
+import tty
+
+import numpy as np
+
+from Checkpoint import Checkpoint
+from Ecg import ECG
+from RawData import RawData
+from RecordedData import RecordedData
+from ReplayData import ReplayData
+from SyntheticData import SyntheticData
+
+
+def run(ecg, samples):
+    while len(ecg.raw_data.data) < samples and not ecg.raw_data.finished:
+        ecg.update()
+
+
+def test_resumed_run_matches_an_uninterrupted_one(synthetic, tmp_path):
+    times, values, _ = synthetic(240)
+    recording = RecordedData(times, values)
+
+    uninterrupted = ECG(raw_data=ReplayData(recording))
+    run(uninterrupted, len(times))
+
+    interrupted = ECG(raw_data=ReplayData(recording))
+    checkpoint = Checkpoint(interrupted, str(tmp_path))
+    run(interrupted, 100 * 200)
+    checkpoint.checkpoint(wait=True)
+    run(interrupted, 150 * 200)
+    checkpoint.checkpoint(wait=True)
+    saved = len(interrupted.raw_data.data)
+
+    resumed = ECG(raw_data=ReplayData(recording))
+    assert Checkpoint(resumed, str(tmp_path)).restore()
+    assert len(resumed.raw_data.data) == saved
+
+    # the restored buffers are read-only maps of the samples files, the pipeline has to keep appending to them
+    run(resumed, len(times))
+    for key, buffer in Checkpoint(uninterrupted, str(tmp_path / 'unused')).buffers():
+        other = dict(Checkpoint(resumed, str(tmp_path / 'unused')).buffers())[key]
+        assert np.array_equal(buffer.times, other.times), key
+        assert np.allclose(buffer.values, other.values), key
+
+
+def test_restore_ignores_samples_of_an_interrupted_write(synthetic, tmp_path):
+    times, values, _ = synthetic(60)
+    ecg = ECG(raw_data=ReplayData(RecordedData(times, values)))
+    checkpoint = Checkpoint(ecg, str(tmp_path))
+    run(ecg, 30 * 200)
+    checkpoint.checkpoint(wait=True)
+    saved = len(ecg.raw_data.data)
+
+    with open(checkpoint.samples_path('raw_data.data'), 'ab') as samples_file:
+        samples_file.write(b'\x01' * 24)
+
+    restored = ECG(raw_data=ReplayData(RecordedData(times, values)))
+    assert Checkpoint(restored, str(tmp_path)).restore()
+    assert len(restored.raw_data.data) == saved
+    assert np.array_equal(restored.raw_data.data.times, times[:saved])
+
+
+def test_serial_resume_continues_the_timeline(tmp_path):
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    try:
+        first = ECG(os.ttyname(slave))
+        first.raw_data.add_data(5000000 + 5000 * np.arange(500), np.full(500, 500))
+        last_time = first.raw_data.data[-1].time
+        Checkpoint(first, str(tmp_path)).checkpoint(wait=True)
+
+        resumed = ECG(os.ttyname(slave))
+        assert Checkpoint(resumed, str(tmp_path)).restore()
+
+        # the restarted device counts micros from zero again
+        resumed.raw_data.add_data(100 + 5000 * np.arange(500), np.full(500, 500))
+    finally:
+        os.close(master)
+        os.close(slave)
+
+    new_times = resumed.raw_data.data.times[400:]
+    assert np.isclose(new_times[0], last_time + 0.005)
+    assert np.allclose(np.diff(new_times), 0.005)
+    assert resumed.raw_data.timestamp_wraps == 0
+
+
+def test_resumed_synthetic_run_continues_the_same_signal(tmp_path):
+    uninterrupted = ECG(raw_data=SyntheticData(seed=0, lead_off_rate=1 / 20.))
+    run(uninterrupted, 90 * 200)
+
+    interrupted = ECG(raw_data=SyntheticData(seed=0, lead_off_rate=1 / 20.))
+    run(interrupted, 40 * 200)
+    Checkpoint(interrupted, str(tmp_path)).checkpoint(wait=True)
+
+    resumed = ECG(raw_data=SyntheticData(seed=1, lead_off_rate=1 / 20.))
+    assert Checkpoint(resumed, str(tmp_path)).restore()
+    run(resumed, 90 * 200)
+
+    assert np.array_equal(resumed.raw_data.data.times, uninterrupted.raw_data.data.times)
+    assert np.array_equal(resumed.raw_data.data.values, uninterrupted.raw_data.data.values)
+    assert resumed.raw_data.lead_off_periods == uninterrupted.raw_data.lead_off_periods
+
+
+def test_only_a_component_s_own_transient_attributes_are_left_out(tmp_path):
+    ecg = ECG(raw_data=ReplayData(RecordedData(np.arange(10.0), np.zeros(10))))
+    ecg.integration.values = [1.0, 2.0]
+    ecg.raw_data.start_clock = 123.0
+    state, _ = Checkpoint(ecg, str(tmp_path)).collect()
+
+    assert state['components']['integration']['values'] == [1.0, 2.0]
+    assert 'start_clock' not in state['components']['raw_data']
+    assert 'values' not in state['components']['raw_data']
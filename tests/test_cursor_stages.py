@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from Derivative import Derivative
+from Integration import Integration
+from RecordedData import RecordedData
+from SignalBuffer import SignalBuffer
+from Squaring import Squaring
+
+
+def test_derivative_matches_five_point_kernel(feed):
+    rng = np.random.RandomState(1)
+    times = np.arange(500) / 200.0
+    values = rng.randn(500)
+    source = RecordedData()
+    stage = Derivative(source)
+    feed(source, times, values, stage.update, chunk_size=lambda: rng.randint(1, 50))
+
+    sampling_time = (times[4:] - times[:-4]) / 4
+    expected = (-values[:-4] - 2 * values[1:-3] + 2 * values[3:-1] + values[4:]) / (8 * sampling_time)
+    assert np.array_equal(stage.data.times, times[2:-2])
+    assert np.allclose(stage.data.values, expected)
+
+
+def test_squaring_squares_every_sample(feed):
+    rng = np.random.RandomState(2)
+    times = np.arange(300, dtype=float)
+    values = rng.randn(300)
+    source = RecordedData()
+    stage = Squaring(source)
+    feed(source, times, values, stage.update, chunk_size=lambda: rng.randint(1, 50))
+
+    assert np.array_equal(stage.data.values, values**2)
+
+
+def test_integration_boxes_do_not_depend_on_chunking(feed):
+    rng = np.random.RandomState(3)
+    times = np.arange(1000, dtype=float)
+    values = rng.rand(1000)
+    source = RecordedData()
+    stage = Integration(source, box_size=30)
+    feed(source, times, values, stage.update, chunk_size=lambda: rng.randint(1, 50))
+
+    boxes = values[:990].reshape(-1, 30).mean(axis=1)
+    assert np.array_equal(stage.data.times, times[29:990:30])
+    assert np.allclose(stage.data.values, boxes)
+
+
+def test_integration_moving_window():
+    times = np.arange(100, dtype=float)
+    source = RecordedData(times, np.ones(100))
+    stage = Integration(source, box_size=10, step=1)
+    stage.update()
+
+    assert len(stage.data) == 91
+    assert np.allclose(stage.data.values, 1)
+
+
+def test_stages_skip_samples_evicted_from_a_bounded_source():
+    times = np.arange(1000, dtype=float)
+    values = np.sin(times)
+    for stage_type in (Derivative, Squaring, Integration):
+        source = SimpleNamespace(data=SignalBuffer(100))
+        stage = stage_type(source)
+        source.data.extend(times[:50], values[:50])
+        stage.update()
+        source.data.extend(times[50:], values[50:])
+        assert source.data.first_index > stage.cursor
+
+        stage.update()
+        assert stage.data.times[-1] > times[-40]
+        assert np.all(np.diff(stage.data.times) > 0)
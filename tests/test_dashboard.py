@@ -0,0 +1,61 @@
+import os
+import signal
+import time
+
+from BatchAnalysis import BatchAnalysis
+from Dashboard import Dashboard
+from RecordedData import RecordedData
+
+
+def analysed(synthetic):
+    times, values, _ = synthetic(30)
+    analysis = BatchAnalysis(RecordedData(times, values))
+    analysis.run()
+    return analysis.ecg
+
+
+def send_frames(dashboard, count):
+    for _ in range(count):
+        dashboard.last_frame = 0
+        dashboard.update()
+        time.sleep(0.05)
+
+
+def test_snapshot_holds_the_recent_window(synthetic):
+    ecg = analysed(synthetic)
+    frame = Dashboard(ecg).snapshot()
+
+    times, _ = frame['raw_data']
+    assert times[-1] - times[0] <= Dashboard.SIGNAL_WINDOW
+    assert set(frame) == set(Dashboard.SIGNALS + Dashboard.METRICS + ('r_peaks',))
+
+
+def test_interrupted_renderer_still_saves_its_output(synthetic, tmp_path):
+    output = str(tmp_path / 'dashboard.png')
+    dashboard = Dashboard(analysed(synthetic), headless=True, output=output)
+    dashboard.start()
+    send_frames(dashboard, 1)
+    deadline = time.time() + 30
+    while not dashboard.queue.empty() and time.time() < deadline:
+        time.sleep(0.05)
+
+    # Ctrl-C reaches the whole process group, the renderer has to leave it to the pipeline
+    os.kill(dashboard.process.pid, signal.SIGINT)
+    send_frames(dashboard, 2)
+    dashboard.stop()
+
+    assert dashboard.process.exitcode == 0
+    assert os.path.getsize(output) > 0
+
+
+def test_stop_returns_when_the_renderer_died(synthetic):
+    dashboard = Dashboard(analysed(synthetic), headless=True)
+    dashboard.start()
+    dashboard.process.kill()
+    dashboard.process.join()
+
+    send_frames(dashboard, Dashboard.QUEUE_SIZE + 2)
+    start = time.time()
+    dashboard.stop()
+    assert time.time() - start < Dashboard.STOP_TIMEOUT
+    assert dashboard.dropped_frames > 0
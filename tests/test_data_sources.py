@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+
+from RawData import RawData
+from RecordedData import RecordedData
+from ReplayData import ReplayData
+from SyntheticData import SyntheticData
+from VirtualSerialPort import VirtualSerialPort
+
+
+def test_replay_returns_the_recording_in_chunks():
+    times = np.arange(1000) / 200.0
+    replay = ReplayData(RecordedData(times, np.arange(1000.0)), chunk_size=64)
+
+    updates = 0
+    while not replay.finished:
+        replay.update()
+        updates += 1
+
+    assert updates == 16
+    assert np.array_equal(replay.data.times, times)
+    assert np.array_equal(replay.data.values, np.arange(1000.0))
+
+
+def test_replay_is_paced_by_speed():
+    times = np.arange(400) / 200.0
+    replay = ReplayData(RecordedData(times, np.zeros(400)), speed=10)
+
+    replay.update()
+    time.sleep(0.1)
+    replay.update()
+
+    # 0.1 s at ten times real time are one second of recording
+    assert 150 <= len(replay.data) <= 260
+
+
+def test_synthetic_data_is_reproducible_and_drops_lead_off():
+    first = SyntheticData(seed=3, chunk_size=2000, lead_off_rate=0.5)
+    second = SyntheticData(seed=3, chunk_size=2000, lead_off_rate=0.5)
+    first.update()
+    second.update()
+
+    assert np.array_equal(first.data.values, second.data.values)
+    assert first.lead_off_samples > 0
+    assert len(first.data) + first.lead_off_samples == 2000
+    assert np.all((first.data.values >= 0) & (first.data.values <= SyntheticData.MAX_VALUE))
+    assert np.allclose(np.diff(first.beats.times), first.beats.values[:-1])
+
+
+def test_virtual_serial_port_feeds_raw_data():
+    for protocol in RawData.PROTOCOLS:
+        source = ReplayData(RecordedData(np.arange(600) / 200.0, 100 + np.arange(600.0) % 800))
+        port = VirtualSerialPort(source, protocol=protocol)
+        raw_data = RawData(port.port_name)
+        port.start()
+        raw_data.start()
+        try:
+            deadline = time.time() + 5
+            while len(raw_data.data) < 600 - RawData.WARMUP_STEPS and time.time() < deadline:
+                raw_data.wait(0.1)
+                raw_data.update()
+        finally:
+            raw_data.stop()
+            port.close()
+
+        assert raw_data.protocol == protocol
+        assert np.array_equal(raw_data.data.values, 100 + np.arange(RawData.WARMUP_STEPS, 600.0) % 800)
@@ -0,0 +1,51 @@
+import numpy as np
+from scipy.signal import lfilter
+
+from Equalizer import Equalizer
+from RecordedData import RecordedData
+
+
+def test_overlap_add_matches_direct_convolution(feed):
+    rng = np.random.RandomState(0)
+    times = np.arange(8000) / 200.0
+    values = rng.randn(len(times))
+    fir = np.hamming(31) / np.sum(np.hamming(31))
+
+    for fft_size in (None, 64, 100, 40, 31, 16):
+        source = RecordedData()
+        stage = Equalizer(source, fir=fir, fs=200, fft_size=fft_size)
+        feed(source, times, values, stage.update, chunk_size=lambda: rng.randint(1, 300))
+
+        assert stage.block_size > 0
+        # sizes above the FIR length are used as requested, smaller ones are rounded up
+        if fft_size is not None:
+            assert stage.fft_size == (fft_size if fft_size > len(fir) else 64)
+        # zero phase: output sample n is the filtered input centred on sample n
+        expected = lfilter(fir, 1, np.concatenate((np.full(len(fir), values[0]), values)))[len(fir) + 15:]
+        count = len(stage.data)
+        assert count > len(times) - stage.fft_size
+        assert np.array_equal(stage.data.times, times[:count])
+        assert np.allclose(stage.data.values, expected[:count])
+
+
+def test_transfer_function_designs_a_band_pass():
+    times = np.arange(20000) / 200.0
+    source = RecordedData(times, np.sin(2 * np.pi * 10 * times) + np.sin(2 * np.pi * 40 * times))
+    stage = Equalizer(source, transfer_function=lambda frequency: 1 if 5 < abs(frequency) < 15 else 0)
+    stage.update()
+
+    values = stage.data.values[2000:]
+    passed = np.sin(2 * np.pi * 10 * stage.data.times[2000:])
+    assert np.sqrt(np.mean((values - passed)**2)) < 0.05
+    assert stage.fft_size >= 2 * len(stage.fir)
+
+
+def test_vectorized_and_scalar_transfer_functions_agree():
+    times = np.arange(2000) / 200.0
+    values = np.random.RandomState(1).randn(len(times))
+    scalar = Equalizer(RecordedData(times, values), transfer_function=lambda frequency: 1 if frequency < 20 else 0)
+    vectorized = Equalizer(RecordedData(times, values), transfer_function=lambda frequencies: (frequencies < 20) * 1.0)
+    scalar.update()
+    vectorized.update()
+
+    assert np.allclose(scalar.data.values, vectorized.data.values)
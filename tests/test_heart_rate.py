@@ -0,0 +1,54 @@
+import numpy as np
+
+from HeartRate import HeartRate
+from RecordedData import RecordedData
+from TimeIntervals import TimeIntervals
+
+
+def peaks(count=200, seed=0):
+    rng = np.random.RandomState(seed)
+    return np.cumsum(0.8 + 0.05 * rng.randn(count))
+
+
+def test_heart_rate_averages_the_preceding_peaks(feed):
+    times = peaks()
+    source = RecordedData()
+    heart_rate = HeartRate(source)
+    feed(source, times, np.ones(len(times)), heart_rate.update, chunk_size=7)
+
+    expected = [HeartRate.calculate_heart_rate(source.data[max(index - 10, 0):index]) for index in range(len(times))]
+    assert np.array_equal(heart_rate.data.times, times)
+    assert np.allclose(heart_rate.data.values, expected)
+    assert np.allclose(heart_rate.instantaneous.values, 60 / np.diff(times))
+    assert np.isclose(heart_rate.over(seconds=30), 60 * (np.sum(times >= times[-1] - 30) - 1)
+                      / (times[-1] - times[times >= times[-1] - 30][0]))
+
+
+def test_intervals_are_flagged(feed):
+    times = peaks(seed=1)
+    # an early beat followed by a compensatory pause, and a missed beat
+    times = np.sort(np.concatenate((times[:50], [times[49] + 0.45], times[50:100], times[101:])))
+
+    source = RecordedData()
+    intervals = TimeIntervals(source)
+    feed(source, times, np.ones(len(times)), intervals.update, chunk_size=7)
+
+    flags = intervals.flags.values
+    assert np.allclose(intervals.data.values, np.diff(times))
+    assert flags[49] == TimeIntervals.ECTOPIC
+    assert TimeIntervals.ECTOPIC in flags[98:101]
+    assert np.count_nonzero(flags == TimeIntervals.NORMAL) > len(flags) - 6
+    assert np.array_equal(intervals.normal.values, intervals.data.values[flags == TimeIntervals.NORMAL])
+
+
+def test_out_of_range_intervals_and_windows(feed):
+    times = np.array([0, 0.8, 1.6, 1.7, 2.5, 5.5, 6.3, 7.1])
+    source = RecordedData()
+    intervals = TimeIntervals(source)
+    feed(source, times, np.ones(len(times)), intervals.update, chunk_size=3)
+
+    assert intervals.flags.values.tolist().count(TimeIntervals.OUT_OF_RANGE) == 2
+    window_times, window_values = intervals.window(beats=2)
+    assert np.allclose(window_values, [0.8, 0.8])
+    _, normal_values = intervals.window(seconds=10, normal=True)
+    assert np.all((normal_values >= TimeIntervals.MIN_INTERVAL) & (normal_values <= TimeIntervals.MAX_INTERVAL))
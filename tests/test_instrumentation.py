@@ -0,0 +1,48 @@
+import urllib.request
+
+from Ecg import ECG
+from Instrumentation import Histogram, Instrumentation
+from RecordedData import RecordedData
+
+
+def test_histogram_quantiles_and_exposition():
+    histogram = Histogram(buckets=(1, 2, 3))
+    for value in (0.5, 1.5, 1.5, 2.5, 10):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 2
+    assert histogram.quantile(1.0) == float('inf')
+    lines = histogram.prometheus('latency', 'stage="x"')
+    assert 'latency_bucket{stage="x",le="2"} 3' in lines
+    assert 'latency_bucket{stage="x",le="+Inf"} 5' in lines
+    assert 'latency_count{stage="x"} 5' in lines
+
+
+def test_instrumented_updates_count_samples(synthetic, feed, tmp_path):
+    times, values, _ = synthetic(30)
+    source = RecordedData()
+    instrumentation = Instrumentation(ECG.STAGES, dump_path=str(tmp_path / 'metrics.prom'))
+    ecg = ECG(raw_data=source, instrumentation=instrumentation)
+
+    feed(source, times, values, ecg.update, chunk_size=100)
+
+    assert instrumentation.updates == len(range(0, len(times), 100))
+    assert instrumentation.samples_out['raw_data'] == 0
+    assert instrumentation.samples_in['resampling'] == len(times)
+    assert instrumentation.samples_out['r_peaks'] == len(ecg.r_peaks.data) > 10
+    assert instrumentation.update_time['band_pass'].count == instrumentation.updates
+
+    instrumentation.dump(str(tmp_path / 'metrics.prom'))
+    with open(str(tmp_path / 'metrics.prom')) as infile:
+        assert 'ecg_stage_samples_out_total{stage="r_peaks"}' in infile.read()
+
+
+def test_metrics_are_served_over_http():
+    instrumentation = Instrumentation(('raw_data',), port=0)
+    try:
+        port = instrumentation.server.server_address[1]
+        body = urllib.request.urlopen('http://127.0.0.1:{}/metrics'.format(port), timeout=5).read().decode()
+    finally:
+        instrumentation.close()
+
+    assert '# TYPE ecg_update_seconds histogram' in body
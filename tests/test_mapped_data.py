@@ -0,0 +1,49 @@
+import numpy as np
+
+from MappedData import MappedData
+
+
+def write_capture(path, count=20000, partial=False):
+    times = np.cumsum(np.random.RandomState(0).uniform(0.004, 0.006, count))
+    values = np.arange(count, dtype=float)
+    data = np.column_stack((times, values)).astype(MappedData.DTYPE).tobytes()
+    with open(path, 'wb') as outfile:
+        outfile.write(data + (b'\x00' * 5 if partial else b''))
+    return times, values
+
+
+def test_locate_matches_a_full_search(tmp_path):
+    path = str(tmp_path / 'capture.raw')
+    times, _ = write_capture(path)
+    mapped = MappedData(path)
+
+    for time in np.random.RandomState(1).uniform(-1, times[-1] + 1, 200).tolist() + times[::997].tolist():
+        for side in ('left', 'right'):
+            assert mapped.locate(time, side) == np.searchsorted(times, time, side=side)
+
+
+def test_segments_share_the_mapping(tmp_path):
+    path = str(tmp_path / 'capture.raw')
+    times, values = write_capture(path, partial=True)
+    mapped = MappedData(path)
+
+    assert len(mapped) == len(times)
+    assert mapped.time_range == (times[0], times[-1])
+
+    segment = mapped.segment(30, 40)
+    mask = (times >= 30) & (times < 40)
+    assert np.array_equal(segment.data.times, times[mask])
+    assert np.array_equal(segment.data.values, values[mask])
+    assert segment.samples is mapped.samples
+    assert len(mapped.data) == len(times)
+
+
+def test_mapped_buffer_accepts_new_samples(tmp_path):
+    path = str(tmp_path / 'capture.raw')
+    times, _ = write_capture(path, count=100)
+    mapped = MappedData(path)
+
+    mapped.data.extend(times[:0], times[:0])
+    mapped.data.append(times[-1] + 1, -1.0)
+    assert len(mapped.data) == 101
+    assert mapped.samples.shape == (100, 2)
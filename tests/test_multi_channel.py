@@ -0,0 +1,39 @@
+import numpy as np
+
+from Ecg import ECG
+from MultiChannel import MultiChannel
+from SyntheticData import SyntheticData
+
+
+def source(channel):
+    # different chunk sizes leave the channels with ragged tails that are filtered one by one
+    return SyntheticData(heart_rate=60 + 5 * channel, seed=channel, chunk_size=20 + channel % 3)
+
+
+def test_batched_channels_match_separate_pipelines():
+    host = MultiChannel([source(channel) for channel in range(6)], fs=200)
+    while host.signal_time < 40:
+        host.step()
+
+    for channel, ecg in enumerate(host.channels):
+        separate = ECG(raw_data=source(channel), fs=200)
+        while len(separate.raw_data.data) < len(ecg.raw_data.data):
+            separate.update()
+
+        for name in ('band_pass', 'integration', 'r_peaks'):
+            batched, expected = getattr(ecg, name).data, getattr(separate, name).data
+            count = min(len(batched), len(expected)) - 5
+            assert count > 0
+            assert np.array_equal(batched.times[:count], expected.times[:count]), name
+            assert np.allclose(batched.values[:count], expected.values[:count]), name
+
+
+def test_stages_with_equal_parameters_run_batched():
+    host = MultiChannel([source(channel) for channel in range(4)], fs=200)
+    for _ in range(20):
+        host.step()
+
+    for name in MultiChannel.BATCHED_STAGES:
+        keys = set(MultiChannel.batch_key(name, getattr(ecg, name)) for ecg in host.channels)
+        assert len(keys) == 1, name
+        assert host.batches[name] > 0, name
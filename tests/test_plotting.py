@@ -0,0 +1,51 @@
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from BatchAnalysis import BatchAnalysis
+from Decimation import Decimation
+from Plotter import Plotter
+from RecordedData import RecordedData
+
+
+def test_decimation_keeps_the_extremes_of_every_view():
+    rng = np.random.RandomState(0)
+    times = np.arange(200000) / 200.0
+    values = rng.randn(len(times))
+    decimation = Decimation(times, values)
+
+    for start, stop in ((None, None), (100, 400), (500.2, 500.9)):
+        selected_times, selected_values = decimation.select(start, stop, points=2000)
+        mask = np.ones(len(times), dtype=bool)
+        if start is not None:
+            mask = (times >= start) & (times <= stop)
+
+        assert len(selected_times) <= 2 * (2000 + 2)
+        assert selected_values.max() >= values[mask].max()
+        assert selected_values.min() <= values[mask].min()
+
+
+def test_zoomed_view_is_at_full_resolution():
+    times = np.arange(50000) / 200.0
+    decimation = Decimation(times, np.sin(times))
+
+    selected_times, selected_values = decimation.select(10, 12, points=1000)
+    assert np.array_equal(selected_times, times[1999:2402])
+    assert np.array_equal(selected_values, np.sin(times[1999:2402]))
+
+
+def test_plotter_redraws_on_zoom(synthetic):
+    times, values, _ = synthetic(60)
+    analysis = BatchAnalysis(RecordedData(times, values))
+    analysis.run()
+
+    plotter = Plotter(analysis.ecg)
+    plotter.plot()
+    try:
+        axes, line, _ = plotter.lines[0]
+        axes.set_xlim(10, 12)
+        assert np.all((line.get_xdata() >= 9.9) & (line.get_xdata() <= 12.1))
+        assert len(line.get_xdata()) < 500
+    finally:
+        plt.close('all')
@@ -0,0 +1,163 @@
+import os
+import time
+import tty
+
+import numpy as np
+import pytest
+
+from RawData import RawData
+
+
+@pytest.fixture
+def port():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    yield master, os.ttyname(slave)
+    os.close(master)
+    os.close(slave)
+
+
+def ascii_lines(timestamps, values):
+    return "".join("{}||{}\r\n".format(t, v) for t, v in zip(timestamps, values)).encode()
+
+
+def collect(raw_data, count, timeout=5):
+    deadline = time.time() + timeout
+    while len(raw_data.data) < count and time.time() < deadline:
+        raw_data.wait(0.1)
+        raw_data.update()
+
+
+def test_ascii_lines_are_parsed_in_bulk(port):
+    _, name = port
+    raw_data = RawData(name, protocol='ascii')
+    timestamps = 1000000 + 5000 * np.arange(300)
+    raw_data.buffer += ascii_lines(timestamps, np.arange(300) % 900)
+
+    raw_data.add_data(*raw_data.parse())
+
+    # the first samples are skipped while the sensor settles
+    assert len(raw_data.data) == 300 - RawData.WARMUP_STEPS
+    assert np.allclose(raw_data.data.times, (timestamps[RawData.WARMUP_STEPS:] - timestamps[RawData.WARMUP_STEPS]) / 1e6)
+    assert np.array_equal(raw_data.data.values, np.arange(RawData.WARMUP_STEPS, 300) % 900)
+    assert raw_data.dropped_bytes == 0
+
+
+def test_partial_and_invalid_lines(port):
+    _, name = port
+    raw_data = RawData(name, protocol='ascii')
+    raw_data.buffer += b"100||5\r\n1x0||7\r\n200||6\r\n30"
+
+    times, values, _ = raw_data.parse()
+    assert times.tolist() == [100, 200] and values.tolist() == [5, 6]
+    assert raw_data.invalid_lines == 1
+    assert raw_data.buffer == b"30"
+
+
+def test_out_of_range_values_and_timestamp_wrap(port):
+    _, name = port
+    raw_data = RawData(name, protocol='ascii')
+    raw_data.warmup_counter = RawData.WARMUP_STEPS
+
+    raw_data.add_data(np.array([2**32 - 10000, 2**32 - 5000]), np.array([10, 2000]))
+    raw_data.add_data(np.array([0, 5000]), np.array([11, 12]))
+
+    assert raw_data.out_of_range == 1
+    assert np.allclose(raw_data.data.times, [0, 0.01, 0.015])
+    assert np.allclose(raw_data.saturated.times, [0.005]) and raw_data.saturated.values.tolist() == [2000]
+
+
+def test_background_thread_reads_the_port(port):
+    master, name = port
+    raw_data = RawData(name, protocol='ascii')
+    raw_data.start()
+    try:
+        for start in range(0, 400, 50):
+            timestamps = 5000 * np.arange(start, start + 50)
+            os.write(master, ascii_lines(timestamps, np.full(50, 500)))
+        collect(raw_data, 400 - RawData.WARMUP_STEPS)
+    finally:
+        raw_data.stop()
+
+    assert len(raw_data.data) == 400 - RawData.WARMUP_STEPS
+    assert np.all(np.diff(raw_data.data.times) > 0)
+    assert raw_data.overruns == 0
+
+
+def frame(timestamp, value, flags=0):
+    records = np.zeros(1, dtype=RawData.FRAME_DTYPE)
+    records['sync'] = RawData.SYNC_WORD[0] | RawData.SYNC_WORD[1] << 8
+    records['time'] = timestamp
+    records['value'] = value
+    records['flags'] = flags
+    records['crc'] = RawData.crc8(records.view(np.uint8).reshape(1, -1))
+    return records.tobytes()
+
+
+def test_binary_frames_resynchronize_after_garbage(port):
+    _, name = port
+    raw_data = RawData(name)
+    raw_data.buffer += b"".join(frame(1000 * index, index) for index in range(10))
+    raw_data.buffer += b"\x00\xa5\x13"
+    raw_data.buffer += b"".join(frame(1000 * index, index) for index in range(10, 20))
+
+    assert raw_data.detect_protocol() == 'binary'
+    times, values, _ = raw_data.parse()
+    assert values.tolist() == list(range(20))
+    assert raw_data.dropped_bytes == 3
+
+
+def test_binary_lead_off_frames_are_not_samples(port):
+    _, name = port
+    raw_data = RawData(name, protocol='binary')
+    raw_data.buffer += frame(0, 500) + frame(1000, 0, flags=3) + frame(2000, 501)
+    raw_data.warmup_counter = RawData.WARMUP_STEPS
+
+    times, values, lead_off = raw_data.parse()
+    assert lead_off.tolist() == [False, True, False]
+    assert raw_data.lead_off_samples == 1
+    assert raw_data.dropped_bytes == 0
+
+    raw_data.add_data(times, values, lead_off)
+    assert np.allclose(raw_data.data.times, [0, 0.002])
+    assert np.allclose(raw_data.lead_off.times, [0.001])
+
+
+def test_corrupted_frames_fail_the_crc():
+    data = bytearray(frame(0, 500) + frame(1000, 501))
+    data[6] ^= 0x01
+
+    starts, _ = RawData.find_frames(np.frombuffer(bytes(data), dtype=np.uint8))
+    assert starts.tolist() == [10]
+
+
+def test_overlapping_sync_hits_are_resolved_against_accepted_frames():
+    size = RawData.FRAME_DTYPE.itemsize
+    data = np.zeros(32, dtype=np.uint8)
+
+    # valid frames at 0, 5 and 11: 5 lies inside the first one, 11 starts after it
+    for start in (0, 5, 11):
+        data[start:start + 2] = RawData.SYNC_WORD
+    for start in (0, 5, 11):
+        data[start + size - 1] = RawData.crc8(data[None, start:start + size])[0]
+
+    starts, frames = RawData.find_frames(data)
+    assert starts.tolist() == [0, 11]
+    assert np.array_equal(frames[1], data[11:11 + size])
+
+
+def test_ascii_lead_off_lines_are_not_dropped_bytes(port):
+    _, name = port
+    raw_data = RawData(name, protocol='ascii')
+    raw_data.buffer += b"1000||500\r\n2000||Gagal\r\n3000||Gagal\r\n4000||501\r\nbad\r\n"
+    raw_data.warmup_counter = RawData.WARMUP_STEPS
+
+    times, values, lead_off = raw_data.parse()
+    assert lead_off.tolist() == [False, True, True, False]
+    assert raw_data.lead_off_samples == 2
+    assert raw_data.invalid_lines == 1
+    assert raw_data.dropped_bytes == len(b"bad")
+
+    raw_data.add_data(times, values, lead_off)
+    assert raw_data.data.values.tolist() == [500, 501]
+    assert np.allclose(raw_data.lead_off.times, [0.001, 0.002])
@@ -0,0 +1,53 @@
+import numpy as np
+
+from RecordedData import RecordedData
+from Resampling import Resampling
+
+
+def jittered(count=20000, fs=200.0, seed=0):
+    rng = np.random.RandomState(seed)
+    return np.arange(count) / fs + rng.uniform(-3e-4, 3e-4, count) + 0.1234
+
+
+def test_jittered_samples_are_put_on_a_uniform_grid(feed):
+    times = jittered()
+    rng = np.random.RandomState(0)
+    source = RecordedData()
+    stage = Resampling(source)
+    feed(source, times, np.sin(2 * np.pi * times), stage.update, chunk_size=lambda: rng.randint(1, 40))
+
+    assert stage.sample_rate == 200
+    assert abs(stage.source_rate - 200) < 0.1
+    assert np.allclose(np.diff(stage.data.times), 0.005, rtol=0, atol=1e-9)
+    assert np.max(np.abs(stage.data.values - np.sin(2 * np.pi * stage.data.times))) < 0.01
+    assert len(stage.gaps) == 0
+
+
+def test_gaps_are_bridged_or_skipped(feed):
+    times = jittered(seed=1)
+    keep = np.ones(len(times), dtype=bool)
+    keep[[3000, 3001, 7000]] = False
+    keep[10000:10100] = False
+    times = times[keep]
+    rng = np.random.RandomState(0)
+    source = RecordedData()
+    stage = Resampling(source)
+    feed(source, times, np.sin(2 * np.pi * times), stage.update, chunk_size=lambda: rng.randint(1, 40))
+
+    assert len(stage.gaps) == 3
+    assert stage.dropped_samples == 103
+
+    # short gaps are interpolated, after the half second gap the grid resumes on the same phase
+    steps = np.diff(stage.data.times)
+    assert np.count_nonzero(steps > 0.006) == 1
+    assert np.allclose(np.round((stage.data.times - stage.origin) * 200), (stage.data.times - stage.origin) * 200)
+
+
+def test_nominal_rate_starts_the_grid_immediately():
+    times = jittered(count=50, fs=250.0)
+    source = RecordedData(times[:2], np.zeros(2))
+    stage = Resampling(source, fs=250)
+    stage.update()
+
+    assert stage.sample_rate == 250
+    assert len(stage.data) > 0 and stage.data.times[-1] <= times[1]
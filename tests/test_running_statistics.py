@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from PRR50 import PRR50
+from RMSSD import RMSSD
+from RecordedData import RecordedData
+from RunningStatistics import RunningStatistics
+from SignalBuffer import SignalBuffer
+from StandardDeviation import StandardDeviation
+
+
+def reference(values):
+    differences = np.diff(values)
+    return (np.std(values),
+            np.sqrt(np.sum(differences**2) / (len(values) - 1)),
+            np.count_nonzero(np.abs(differences) > RunningStatistics.NN50_THRESHOLD) / (len(values) - 1))
+
+
+def intervals(count=400, seed=0):
+    rng = np.random.RandomState(seed)
+    values = 0.8 + 0.05 * rng.randn(count)
+    return np.cumsum(values), values
+
+
+def test_cumulative_statistics_match_full_history(feed):
+    times, values = intervals()
+    source = RecordedData()
+    statistics = RunningStatistics(source)
+    sdrr = StandardDeviation(source, statistics=statistics)
+    rmssd = RMSSD(source, statistics=statistics)
+    prr50 = PRR50(source, statistics=statistics)
+
+    feed(source, times, values, sdrr.update, rmssd.update, prr50.update, chunk_size=37)
+
+    expected = reference(values)
+    assert np.isclose(sdrr.data[-1].value, expected[0])
+    assert np.isclose(rmssd.data[-1].value, expected[1])
+    assert np.isclose(prr50.data[-1].value, expected[2])
+    assert len(statistics.window) == 0
+
+
+def test_windowed_statistics_match_last_intervals():
+    times, values = intervals(seed=1)
+    source = RecordedData(times, values)
+    statistics = RunningStatistics(source, window_size=50)
+    statistics.update()
+
+    assert len(statistics.standard_deviation) == len(values) - 49
+    for stop in (50, 123, len(values)):
+        expected = reference(values[stop - 50:stop])
+        index = stop - 50
+        assert np.isclose(statistics.standard_deviation[index].value, expected[0])
+        assert np.isclose(statistics.rmssd[index].value, expected[1])
+        assert np.isclose(statistics.prr50[index].value, expected[2])
+
+
+def test_shared_statistics_must_use_the_same_window():
+    source = RecordedData()
+    statistics = RunningStatistics(source, window_size=30)
+
+    assert RMSSD(source, window_size=30, statistics=statistics).data is statistics.rmssd
+    with pytest.raises(ValueError):
+        StandardDeviation(source, statistics=statistics)
+    with pytest.raises(ValueError):
+        PRR50(source, window_size=60, statistics=statistics)
+    assert RunningStatistics.shared(source, 60).window_size == 60
+    assert RunningStatistics.shared(source, 30, statistics) is statistics
+
+
+def test_update_skips_intervals_evicted_from_a_bounded_source():
+    times, values = intervals()
+    source = RecordedData()
+    source.data = SignalBuffer(50)
+    statistics = RunningStatistics(source, window_size=20)
+    source.data.extend(times[:10], values[:10])
+    statistics.update()
+    source.data.extend(times[10:], values[10:])
+    statistics.update()
+
+    assert statistics.cursor == len(values)
+    assert np.isclose(statistics.standard_deviation[-1].value, np.std(values[-20:]))
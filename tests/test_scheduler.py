@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from Ecg import ECG
+from RecordedData import RecordedData
+from Scheduler import Scheduler
+
+
+def schedule(feed, times, values, branches=(), threaded=False):
+    source = RecordedData()
+    ecg = ECG(raw_data=source)
+    scheduler = Scheduler(ecg, branches=branches, threaded=threaded)
+    scheduler.start()
+    try:
+        feed(source, times, values, scheduler.step, chunk_size=50)
+    finally:
+        scheduler.stop()
+    return ecg, scheduler
+
+
+def test_scheduler_matches_polling_chain(synthetic, feed, stream):
+    times, values, _ = synthetic(60)
+    expected = stream(times, values, 50)
+    ecg, scheduler = schedule(feed, times, values)
+
+    for name in ECG.STAGES:
+        assert np.array_equal(getattr(ecg, name).data.times, getattr(expected, name).data.times), name
+    assert np.allclose(ecg.sdrr.data.values, expected.sdrr.data.values)
+
+    # the HRV stages only run when new R peaks arrived
+    assert scheduler.runs['sdrr'] < scheduler.runs['band_pass']
+
+
+def test_threaded_branch_catches_up_on_stop(synthetic, feed, stream):
+    times, values, _ = synthetic(60)
+    expected = stream(times, values, 50)
+    ecg, _ = schedule(feed, times, values, branches=(ECG.HRV_BRANCH,), threaded=True)
+
+    assert np.array_equal(ecg.rr_intervals.data.values, expected.rr_intervals.data.values)
+    assert np.allclose(ecg.rmssd.data.values, expected.rmssd.data.values)
+    assert np.allclose(ecg.hf.data.values, expected.hf.data.values)
+
+
+def test_stage_without_new_input_is_not_ready():
+    source = RecordedData()
+    scheduler = Scheduler(ECG(raw_data=source))
+
+    scheduler.run_stages(ECG.STAGES)
+    assert not scheduler.is_ready('resampling')
+    source.data.append(0.0, 500.0)
+    assert scheduler.is_ready('resampling')
+    assert scheduler.is_ready('raw_data')
+
+
+def test_threaded_branches_reject_bounded_inputs(tmp_path):
+    ecg = ECG(raw_data=RecordedData(), capacity=1000)
+    with pytest.raises(ValueError):
+        Scheduler(ecg, branches=(('r_peaks',) + ECG.HRV_BRANCH,), threaded=True)
+
+    # the HRV branch only reads unbounded buffers, and unthreaded branches run between main chain updates
+    Scheduler(ecg, branches=(ECG.HRV_BRANCH,), threaded=True)
+    Scheduler(ecg, branches=(('r_peaks',) + ECG.HRV_BRANCH,))
+
+    ecg = ECG(raw_data=RecordedData(), capacity=1000)
+    ecg.integration.data.spill_path = str(tmp_path / 'integration.raw')
+    Scheduler(ecg, branches=(('r_peaks',) + ECG.HRV_BRANCH,), threaded=True)
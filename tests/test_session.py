@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from BatchAnalysis import BatchAnalysis
+from Ecg import ECG
+from RecordedData import RecordedData
+from SessionReader import SessionReader
+from SessionWriter import SessionWriter
+
+
+def record(tmp_path, times, values, flushes=4):
+    source = RecordedData()
+    ecg = ECG(raw_data=source)
+    path = str(tmp_path / ('session' + SessionWriter.EXTENSION))
+    ecg.record(path, flush_interval=0)
+
+    for part_times, part_values in zip(np.array_split(times, flushes), np.array_split(values, flushes)):
+        source.data.extend(part_times, part_values)
+        ecg.update()
+        ecg.session.update()
+    ecg.session.close()
+    return ecg, path
+
+
+def test_round_trip_is_exact(synthetic, tmp_path):
+    times, values, _ = synthetic(60)
+    ecg, path = record(tmp_path, times, values)
+    session = SessionReader(path)
+
+    assert session.start_time == ecg.start_time
+    for name in SessionWriter.STREAMS:
+        expected = SessionWriter.stream_buffer(ecg, name)
+        stored_times, stored_values = session.read(name)
+        assert np.array_equal(stored_times, expected.times), name
+        assert np.array_equal(stored_values, expected.values), name
+    assert len(session.chunks('raw_data')) == 4
+
+
+def test_range_reads_and_time_index(synthetic, tmp_path):
+    times, values, _ = synthetic(60)
+    _, path = record(tmp_path, times, values)
+    session = SessionReader(path)
+
+    part_times, part_values = session.read('raw_data', 20, 21.5)
+    mask = (times >= 20) & (times < 21.5)
+    assert np.array_equal(part_times, times[mask])
+    assert np.array_equal(part_values, values[mask])
+    assert session.time_range('raw_data') == (times[0], times[-1])
+    assert session.count('raw_data') == len(times)
+    with pytest.raises(KeyError):
+        session.read('unknown')
+
+
+def test_chunk_lost_in_a_crash_is_ignored(synthetic, tmp_path):
+    times, values, _ = synthetic(20)
+    _, path = record(tmp_path, times, values)
+    last = SessionReader(path).chunks('raw_data')[-1]
+
+    with open(path, 'r+b') as session_file:
+        session_file.truncate(int(last['offset']) + 1)
+
+    session = SessionReader(path)
+    assert session.count('raw_data') == len(times) - int(last['count'])
+
+
+def test_recordings_are_analysed_like_the_live_session(synthetic, tmp_path):
+    times, values, _ = synthetic(60)
+    ecg, path = record(tmp_path, times, values)
+
+    analysis = BatchAnalysis.from_file(path)
+    analysis.run()
+    assert np.array_equal(analysis.ecg.r_peaks.data.times, ecg.r_peaks.data.times)
+    assert os.path.getsize(path) < len(times) * 16 / 2
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from DataPoint import DataPoint
+from SignalBuffer import SignalBuffer
+
+
+def test_append_extend_and_index():
+    buffer = SignalBuffer()
+    buffer.append(0.0, 1.0)
+    buffer.extend([1.0, 2.0], [2.0, 3.0])
+
+    assert len(buffer) == 3
+    assert buffer[-1] == DataPoint(time=2.0, value=3.0)
+    assert buffer[0:2] == [DataPoint(0.0, 1.0), DataPoint(1.0, 2.0)]
+    assert list(buffer) == [DataPoint(0.0, 1.0), DataPoint(1.0, 2.0), DataPoint(2.0, 3.0)]
+    assert buffer.search(1.5) == 2
+
+
+def test_growth_keeps_samples():
+    buffer = SignalBuffer()
+    times = np.arange(5000, dtype=float)
+    for start in range(0, len(times), 700):
+        buffer.extend(times[start:start + 700], -times[start:start + 700])
+
+    assert np.array_equal(buffer.times, times)
+    assert np.array_equal(buffer.values, -times)
+
+
+def test_capacity_evicts_and_keeps_absolute_indices():
+    buffer = SignalBuffer(capacity=100)
+    times = np.arange(1000, dtype=float)
+    for start in range(0, len(times), 30):
+        buffer.extend(times[start:start + 30], times[start:start + 30])
+
+    assert len(buffer) == 1000
+    # at least capacity samples are retained, at most the doubled storage
+    assert 800 <= buffer.first_index <= 900
+    assert buffer[999] == DataPoint(999.0, 999.0)
+    assert np.array_equal(buffer.since(950)[0], times[950:])
+    with pytest.raises(IndexError):
+        buffer.window(0, 10)
+
+
+def test_spilled_samples_stay_readable(tmp_path):
+    buffer = SignalBuffer(capacity=64, spill_path=str(tmp_path / 'spill.bin'))
+    times = np.arange(1000, dtype=float)
+    buffer.extend(times[:10], times[:10])
+    buffer.extend(times[10:], times[10:])
+
+    window_times, window_values = buffer.window(0, 1000)
+    assert np.array_equal(window_times, times)
+    assert np.array_equal(window_values, times)
+    assert buffer[3] == DataPoint(3.0, 3.0)
+
+
+def test_wrap_shares_until_append():
+    times = np.arange(10, dtype=float)
+    values = times * 2
+    buffer = SignalBuffer.wrap(times, values)
+    assert np.shares_memory(buffer.times, times)
+
+    buffer.append(10.0, 20.0)
+    assert not np.shares_memory(buffer.times, times)
+    assert len(times) == 10 and len(buffer) == 11
+
+
+def test_reset_with_read_only_arrays_accepts_extends():
+    times = np.arange(10, dtype=float)
+    values = times.copy()
+    times.flags.writeable = False
+    values.flags.writeable = False
+
+    buffer = SignalBuffer()
+    buffer.reset(times, values, first_index=5)
+    buffer.extend(np.zeros(0), np.zeros(0))
+    buffer.extend([10.0], [10.0])
+    buffer.append(11.0, 11.0)
+
+    assert len(buffer) == 17
+    assert np.array_equal(buffer.times, np.arange(12, dtype=float))
@@ -0,0 +1,78 @@
+import numpy as np
+
+from BatchAnalysis import BatchAnalysis
+from Ecg import ECG
+from RecordedData import RecordedData
+from SignalQuality import SignalQuality
+from SyntheticData import SyntheticData
+from TimeIntervals import TimeIntervals
+
+
+def overlapping(quality, periods):
+    # a segment reaches up to the next one, across a gap the grid skipped
+    starts = quality.flags.times
+    stops = np.append(starts[1:], quality.covered)
+    return np.array([any(start < period_stop and stop > period_start for period_start, period_stop in periods)
+                     for start, stop in zip(starts, stops)])
+
+
+def test_recorded_lead_off_is_flagged():
+    source = SyntheticData(seed=0, lead_off_rate=1 / 20., chunk_size=200)
+    ecg = ECG(raw_data=source)
+    while len(source.data) + source.lead_off_samples < 120 * 200:
+        ecg.update()
+
+    quality = ecg.signal_quality
+    flags = quality.flags.values.astype(int)
+    expected = overlapping(quality, source.lead_off_periods)
+
+    assert np.any(expected)
+    assert np.array_equal((flags & SignalQuality.LEAD_OFF) != 0, expected)
+    assert not np.any(flags & SignalQuality.MISSING)
+
+
+def test_gaps_without_records_are_missing_samples(synthetic, stream):
+    times, values, source = synthetic(120, lead_off_rate=1 / 20.)
+    quality = stream(times, values, 200).signal_quality
+    flags = quality.flags.values.astype(int)
+    inside = overlapping(quality, [(start + 0.25, stop - 0.25) for start, stop in source.lead_off_periods])
+
+    assert np.any(inside)
+    assert np.all(flags[inside] & SignalQuality.MISSING)
+    assert not np.any(flags & SignalQuality.LEAD_OFF)
+    assert np.count_nonzero(flags & SignalQuality.UNUSABLE) < len(flags) / 2
+
+
+def test_saturated_samples_are_flagged(synthetic):
+    times, values, _ = synthetic(30)
+    clipped = (times >= 10) & (times < 10.5)
+    source = RecordedData(times[~clipped], values[~clipped])
+    source.saturated.extend(times[clipped], np.full(np.count_nonzero(clipped), 1023))
+    ecg = ECG(raw_data=source)
+    ecg.update()
+
+    quality = ecg.signal_quality
+    flags = quality.flags.values.astype(int)
+    expected = overlapping(quality, [(10, 10.5)])
+    assert np.array_equal((flags & SignalQuality.SATURATION) != 0, expected)
+    assert not np.any(flags & (SignalQuality.MISSING | SignalQuality.LEAD_OFF))
+
+
+def test_intervals_over_a_gap_stay_out_of_the_normal_ones(synthetic, stream):
+    times, values, source = synthetic(120, lead_off_rate=1 / 20.)
+    intervals = stream(times, values, 20).rr_intervals
+    interval_times, flags = intervals.flags.times, intervals.flags.values
+
+    for start, stop in source.lead_off_periods:
+        spanning = (interval_times - intervals.data.values < stop) & (interval_times > start)
+        assert np.all(flags[spanning] == TimeIntervals.UNUSABLE)
+    assert not np.isin(intervals.normal.times, interval_times[flags == TimeIntervals.UNUSABLE]).any()
+
+
+def test_streaming_matches_batch_with_lead_off(synthetic, stream):
+    # a batch that ends in a gap must not search back to a candidate from before it
+    times, values, _ = synthetic(300, lead_off_rate=1 / 20.)
+    analysis = BatchAnalysis(RecordedData(times, values))
+    analysis.run()
+
+    assert np.array_equal(stream(times, values, 20).r_peaks.data.times, analysis.ecg.r_peaks.data.times)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from RecordedData import RecordedData
+from SignalBuffer import SignalBuffer
+from SpectralAnalysis import SpectralAnalysis
+from SpectralPower import SpectralPower
+
+
+def modulated_intervals(lf_amplitude, hf_amplitude, duration=300):
+    times = [0.0]
+    while times[-1] < duration:
+        time = times[-1]
+        times.append(time + 0.8 + lf_amplitude * np.sin(2 * np.pi * 0.1 * time)
+                     + hf_amplitude * np.sin(2 * np.pi * 0.25 * time))
+    times = np.array(times)
+    return times[1:], np.diff(times)
+
+
+@pytest.mark.parametrize('method', SpectralAnalysis.METHODS)
+def test_dominant_band_is_found(method):
+    for lf_amplitude, hf_amplitude in ((0.05, 0.01), (0.01, 0.05)):
+        source = RecordedData(*modulated_intervals(lf_amplitude, hf_amplitude))
+        analysis = SpectralAnalysis(source, time_window=SpectralAnalysis.TIME_WINDOW, stride=50, method=method)
+        analysis.update()
+
+        ratio = analysis.lf_hf_ratio[-1].value
+        assert ratio > 3 if lf_amplitude > hf_amplitude else ratio < 1 / 3
+
+
+def test_incremental_updates_match_one_pass(feed):
+    times, values = modulated_intervals(0.05, 0.03)
+    whole = SpectralAnalysis(RecordedData(times, values), time_window=120)
+    whole.update()
+
+    source = RecordedData()
+    incremental = SpectralAnalysis(source, time_window=120)
+    feed(source, times, values, incremental.update, chunk_size=17)
+
+    assert np.array_equal(incremental.lf.times, whole.lf.times)
+    assert np.allclose(incremental.lf.values, whole.lf.values)
+    assert np.allclose(incremental.hf.values, whole.hf.values)
+
+
+def test_powers_share_one_analysis():
+    source = RecordedData(*modulated_intervals(0.05, 0.03))
+    analysis = SpectralAnalysis(source)
+    lf = SpectralPower(source, 0.04, 0.15, analysis=analysis)
+    hf = SpectralPower(source, 0.15, 0.4, analysis=analysis)
+    lf.update()
+    hf.update()
+
+    assert lf.data is analysis.lf and hf.data is analysis.hf
+    assert len(lf.data) == len(source.data)
+    with pytest.raises(ValueError):
+        SpectralPower(source, 0.5, 1.0, analysis=analysis)
+    with pytest.raises(ValueError):
+        SpectralAnalysis(source, method='fft')
+
+
+def test_update_skips_intervals_evicted_from_a_bounded_source():
+    times, values = modulated_intervals(0.05, 0.01)
+    source = RecordedData()
+    source.data = SignalBuffer(150)
+    analysis = SpectralAnalysis(source, window_size=100, stride=10)
+    source.data.extend(times[:20], values[:20])
+    analysis.update()
+    source.data.extend(times[20:], values[20:])
+    analysis.update()
+
+    expected = SpectralAnalysis(RecordedData(times, values), window_size=100, stride=10)
+    expected.update()
+    assert analysis.lf_hf_ratio.times[-1] == expected.lf_hf_ratio.times[-1]
+    assert np.isclose(analysis.lf_hf_ratio[-1].value, expected.lf_hf_ratio[-1].value)